@@ -2,21 +2,117 @@ import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../src"))
 # Add database path for imports
-from flask import Flask, request, jsonify
+import json
+import time
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from datetime import datetime
-from predict import classify
+from predict import (classify, classify_many, warm_up, watch_for_new_models, get_model_version,
+                     get_prediction_cache_stats)
+from rules import get_rule_stats
+import metrics
 # Add database path for imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../database"))
-from db import save_complaint, save_feedback, get_feedback_accuracy
+from db import (migrate, save_complaints, save_feedback, get_feedback_accuracy,
+                get_recent_feedback_accuracy, get_feedback_accuracy_since, search_complaints,
+                search_time_bound)
+from write_behind import WriteBehindWriter
 app = Flask(__name__)
 
+REQUEST_SECONDS = metrics.histogram("http_request_seconds", "Request latency by route", ["route"])
+REQUESTS        = metrics.counter("http_requests_total", "Requests by route and status code", ["route", "status"])
+
+MAX_TEXT_LENGTH = 2000
+MAX_BATCH_SIZE  = 1000
+STREAM_BATCH    = 64                        #Lines classified together by the streaming endpoint
+MAX_LINE_BYTES  = MAX_TEXT_LENGTH * 8       #Longest NDJSON line accepted, escapes included
+SEARCH_PAGE     = 20                        #Search results per page by default
+MAX_SEARCH_PAGE = 100
+
+# Write-behind mode: responses return once the row is queued and a background
+# thread commits rows in batches. Off by default — every request commits its own row.
+WRITE_BEHIND        = os.environ.get("WRITE_BEHIND", "0") == "1"
+WRITE_BEHIND_POLICY = os.environ.get("WRITE_BEHIND_POLICY", "block")
+_writer = WriteBehindWriter(policy=WRITE_BEHIND_POLICY).start() if WRITE_BEHIND else None
+
+
+# Store predictions, either synchronously or through the write-behind queue
+def persist_predictions(preds):
+    if _writer is None:
+        save_complaints([
+            (p.complaint_text, p.category, p.priority, p.rule_override) for p in preds
+        ])
+        return
+    for p in preds:
+        _writer.submit(p.complaint_text, p.category, p.priority, p.rule_override)
+
+
+# Shape a Prediction into the JSON returned by the classify endpoints
+def prediction_to_dict(pred, classified_at):
+    return {
+        "complaint_text":       pred.complaint_text,
+        "category":             pred.category,
+        "category_confidence":  pred.category_confidence,
+        "priority":             pred.priority,
+        "priority_confidence":  pred.priority_confidence,
+        "rule_override":        pred.rule_override,
+        "rule_explanation":     pred.rule_explanation,
+        "classified_at":        classified_at,
+        "sentiment_label":     pred.sentiment_label,
+        "sentiment_score":     pred.sentiment_score,
+        "sentiment_boosted":   pred.sentiment_boosted,
+        "model_version":       pred.model_version,
+    }
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def record_request(response):
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    if route != "/metrics":
+        REQUEST_SECONDS.labels(route).observe(time.perf_counter() - g.request_start)
+        REQUESTS.labels(route, response.status_code).inc()
+    return response
+
 # Health check route
 @app.route("/health", methods=["GET"])
 def health():
-    return jsonify({
+    status = {
         "status": "ok",
-        "timestamp": datetime.utcnow().isoformat()
-    })
+        "timestamp": datetime.utcnow().isoformat(),
+        "model_version": get_model_version(),
+    }
+    if _writer is not None:
+        status["write_behind"] = _writer.stats()
+    return jsonify(status)
+
+# Per-rule hit counts and evaluation time for the priority rule engine
+@app.route("/rules/stats", methods=["GET"])
+def rule_stats():
+    return jsonify(get_rule_stats())
+
+# Prometheus scrape endpoint — stage latencies, prediction counts, DB writes, requests
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+# Prediction cache hit/miss/eviction counters
+@app.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    return jsonify(get_prediction_cache_stats())
+
+# Check one complaint text and return it stripped — raises ValueError with a
+# message for the client. Shared by every classify endpoint, including api/asgi.py.
+def validate_text(text):
+    if not isinstance(text, str) or not text.strip():
+        raise ValueError("Field 'text' is required and cannot be empty.")
+    text = text.strip()
+    # Limit input length to prevent abuse
+    if len(text) > MAX_TEXT_LENGTH:
+        raise ValueError(f"Text exceeds maximum length of {MAX_TEXT_LENGTH} characters.")
+    return text
 
 # Classification route
 @app.route("/classify-complaint", methods=["POST"])
@@ -25,13 +121,10 @@ def classify_complaint():
         return jsonify({"error": "Content-Type must be application/json"}), 400
     # Validate input
     data = request.get_json()
-    text = data.get("text", "").strip()
-    # Basic input validation
-    if not text:
-        return jsonify({"error": "Field 'text' is required and cannot be empty."}), 400
-    # Limit input length to prevent abuse
-    if len(text) > 2000:
-        return jsonify({"error": "Text exceeds maximum length of 2000 characters."}), 400
+    try:
+        text = validate_text(data.get("text") if isinstance(data, dict) else None)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     # Perform classification
     try:
         pred = classify(text)
@@ -39,20 +132,121 @@ def classify_complaint():
         return jsonify({"error": "Classification failed. Please try again."}), 500
     
     # Save to database
-    save_complaint(pred.complaint_text, pred.category, pred.priority, pred.rule_override)
-    return jsonify({
-        "complaint_text":       pred.complaint_text,
-        "category":             pred.category,
-        "category_confidence":  pred.category_confidence,
-        "priority":             pred.priority,
-        "priority_confidence":  pred.priority_confidence,
-        "rule_override":        pred.rule_override,
-        "rule_explanation":     pred.rule_explanation,
-        "classified_at":        datetime.utcnow().isoformat(),
-        "sentiment_label":     pred.sentiment_label,
-        "sentiment_score":     pred.sentiment_score,
-        "sentiment_boosted":   pred.sentiment_boosted,
-    }), 200
+    persist_predictions([pred])
+    return jsonify(prediction_to_dict(pred, datetime.utcnow().isoformat())), 200
+
+
+# Batch classification route — takes a JSON array of complaint texts
+# (or objects with a "text" field) and classifies them in one pass
+@app.route("/classify-complaint/batch", methods=["POST"])
+def classify_complaint_batch():
+    if not request.is_json:
+        return jsonify({"error": "Content-Type must be application/json"}), 400
+
+    data = request.get_json()
+    if not isinstance(data, list):
+        return jsonify({"error": "Request body must be a JSON array of complaints."}), 400
+    if not data:
+        return jsonify({"error": "Batch cannot be empty."}), 400
+    if len(data) > MAX_BATCH_SIZE:
+        return jsonify({"error": f"Batch exceeds maximum size of {MAX_BATCH_SIZE} complaints."}), 400
+
+    # Validate every item before classifying any of them
+    texts = []
+    for i, item in enumerate(data):
+        try:
+            texts.append(validate_text(item.get("text") if isinstance(item, dict) else item))
+        except ValueError as e:
+            return jsonify({"error": f"Item {i}: {e}"}), 400
+
+    try:
+        preds = classify_many(texts)
+    except Exception as e:
+        return jsonify({"error": "Classification failed. Please try again."}), 500
+
+    # Save the whole batch in one transaction
+    persist_predictions(preds)
+    classified_at = datetime.utcnow().isoformat()
+    return jsonify([prediction_to_dict(p, classified_at) for p in preds]), 200
+
+
+# Parse one NDJSON input line into (text, id) — raises ValueError with a message for the client
+def parse_stream_line(line):
+    try:
+        item = json.loads(line)
+    except ValueError:
+        raise ValueError("Line is not valid JSON.")
+    text = validate_text(item.get("text") if isinstance(item, dict) else item)
+    return text, item.get("id") if isinstance(item, dict) else None
+
+
+# Yield (line_number, raw_line) from the request body without buffering it.
+# An over-long line is drained and yielded as None.
+def read_ndjson_lines(stream):
+    number = 0
+    while True:
+        line = stream.readline(MAX_LINE_BYTES)
+        if not line:
+            return
+        if len(line) == MAX_LINE_BYTES and not line.endswith(b"\n"):
+            while True:
+                rest = stream.readline(MAX_LINE_BYTES)
+                if not rest or rest.endswith(b"\n"):
+                    break
+            line = None
+        elif not line.strip():
+            continue
+        yield number, line
+        number += 1
+
+
+# Streaming classification — the request body is NDJSON (one JSON string or
+# {"text": ..., "id": ...} object per line) and the response is NDJSON, one
+# result per input line in order, sent as each micro-batch is classified.
+# Only STREAM_BATCH lines are held at a time. Bad lines get an error result
+# instead of failing the stream, since the 200 status has already been sent.
+@app.route("/classify-complaint/stream", methods=["POST"])
+def classify_complaint_stream():
+    def results():
+        batch = []
+        for number, line in read_ndjson_lines(request.stream):
+            batch.append((number, line))
+            if len(batch) >= STREAM_BATCH:
+                yield from classify_stream_batch(batch)
+                batch = []
+        if batch:
+            yield from classify_stream_batch(batch)
+
+    return Response(stream_with_context(results()), mimetype="application/x-ndjson")
+
+
+def classify_stream_batch(batch):
+    parsed, errors = [], {}
+    for number, line in batch:
+        try:
+            if line is None:
+                raise ValueError(f"Line exceeds {MAX_LINE_BYTES} bytes.")
+            parsed.append((number, *parse_stream_line(line)))
+        except ValueError as e:
+            errors[number] = str(e)
+
+    preds = {}
+    if parsed:
+        try:
+            classified = classify_many([text for _, text, _ in parsed])
+        except Exception:
+            classified = None
+        if classified is None:
+            errors.update({number: "Classification failed. Please try again." for number, _, _ in parsed})
+        else:
+            persist_predictions(classified)
+            classified_at = datetime.utcnow().isoformat()
+            for (number, _, item_id), pred in zip(parsed, classified):
+                preds[number] = {"line": number, "id": item_id, **prediction_to_dict(pred, classified_at)}
+
+    for number, _ in batch:
+        result = preds.get(number) or {"line": number, "error": errors[number]}
+        yield json.dumps(result) + "\n"
 
 
 @app.route("/feedback", methods=["POST"])
@@ -86,6 +280,7 @@ def feedback():
             predicted_priority  = data["predicted_priority"],
             correct_category    = data["correct_category"],
             correct_priority    = data["correct_priority"],
+            model_version       = data.get("model_version"),
         )
         accuracy = get_feedback_accuracy()
     except Exception as e:
@@ -99,5 +294,72 @@ def feedback():
         "submitted_at"    : datetime.utcnow().isoformat(),
     }), 200
 
+# Recent and lifetime feedback accuracy, served from running counters and
+# hourly rollups. ?last_n= and ?hours= change the default windows.
+@app.route("/feedback/accuracy", methods=["GET"])
+def feedback_accuracy():
+    try:
+        last_n = int(request.args.get("last_n", 100))
+        hours  = int(request.args.get("hours", 24 * 7))
+    except ValueError:
+        return jsonify({"error": "'last_n' and 'hours' must be integers."}), 400
+    if last_n < 1 or hours < 1:
+        return jsonify({"error": "'last_n' and 'hours' must be positive."}), 400
+
+    return jsonify({
+        "lifetime"        : get_feedback_accuracy(),
+        f"last_{last_n}"  : get_recent_feedback_accuracy(last_n),
+        "last_24h"        : get_feedback_accuracy_since(24),
+        f"last_{hours}h"  : get_feedback_accuracy_since(hours),
+        "by_category"     : get_feedback_accuracy_since(hours, "category"),
+        "by_priority"     : get_feedback_accuracy_since(hours, "priority"),
+        "by_model_version": get_feedback_accuracy_since(hours, "model_version"),
+    }), 200
+
+# Full-text search over stored complaints, best match first.
+# ?q= is required; category, priority, since, until, limit and offset are optional.
+@app.route("/search", methods=["GET"])
+def search():
+    query = request.args.get("q", "").strip()
+    if not query:
+        return jsonify({"error": "Query parameter 'q' is required."}), 400
+    try:
+        limit  = int(request.args.get("limit", SEARCH_PAGE))
+        offset = int(request.args.get("offset", 0))
+    except ValueError:
+        return jsonify({"error": "'limit' and 'offset' must be integers."}), 400
+    if not 1 <= limit <= MAX_SEARCH_PAGE or offset < 0:
+        return jsonify({"error": f"'limit' must be 1-{MAX_SEARCH_PAGE} and 'offset' non-negative."}), 400
+    bounds = {}
+    for key in ("since", "until"):
+        try:
+            if request.args.get(key):
+                bounds[key] = search_time_bound(request.args[key], until=key == "until")
+        except ValueError:
+            return jsonify({"error": f"'{key}' must be an ISO date or datetime, e.g. 2024-03-01."}), 400
+
+    try:
+        total, results = search_complaints(
+            query,
+            category = request.args.get("category") or None,
+            priority = request.args.get("priority") or None,
+            since    = bounds.get("since"),
+            until    = bounds.get("until"),
+            limit    = limit,
+            offset   = offset,
+        )
+    except Exception as e:
+        return jsonify({"error": "Search failed. Please try again."}), 500
+
+    next_offset = offset + limit if offset + limit < total else None
+    return jsonify({"query": query, "total": total, "offset": offset, "limit": limit,
+                    "next_offset": next_offset, "results": results}), 200
+
 if __name__ == "__main__":
+    migrate()
+    # The debug reloader re-runs this file in a child process that serves
+    # requests — only that one needs the model and NLTK data in memory
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        warm_up()
+        watch_for_new_models()
     app.run(debug=True, host="0.0.0.0", port=5000)
\ No newline at end of file
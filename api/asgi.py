@@ -0,0 +1,148 @@
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../src"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../database"))
+
+import metrics
+from batcher import MicroBatcher
+from predict import classify_many, warm_up, watch_for_new_models, get_model_version
+from db import migrate
+from app import (MAX_TEXT_LENGTH, REQUEST_SECONDS, REQUESTS, persist_predictions,
+                 prediction_to_dict, validate_text)
+
+MAX_BODY_BYTES = MAX_TEXT_LENGTH * 8 + 1024    #Largest request body read, escapes and other fields included
+
+MAX_BATCH = int(os.environ.get("MICROBATCH_MAX_SIZE", 64))          #Requests per model call
+MAX_WAIT  = float(os.environ.get("MICROBATCH_WAIT_MS", 5)) / 1000   #Longest a request waits for its batch to fill
+
+
+# The batched call: one classify_many and one DB transaction for every
+# request collected in the window
+def classify_and_store(texts):
+    preds = classify_many(texts)
+    persist_predictions(preds)
+    return preds
+
+
+batcher = MicroBatcher(classify_and_store, max_batch=MAX_BATCH, max_wait=MAX_WAIT)
+
+
+async def read_body(receive):
+    body = b""
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        body += message.get("body", b"")
+        if len(body) > MAX_BODY_BYTES:
+            raise ValueError(f"Request body exceeds {MAX_BODY_BYTES} bytes.")
+        if not message.get("more_body"):
+            return body
+
+
+async def send_response(send, status, body, content_type="application/json"):
+    if not isinstance(body, bytes):
+        body = json.dumps(body).encode("utf-8")
+    await send({
+        "type"   : "http.response.start",
+        "status" : status,
+        "headers": [(b"content-type", content_type.encode()), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def classify_complaint(scope, receive):
+    headers = dict(scope["headers"])
+    if not headers.get(b"content-type", b"").startswith(b"application/json"):
+        return 400, {"error": "Content-Type must be application/json"}
+    try:
+        body = await read_body(receive)
+    except ValueError as e:
+        return 400, {"error": str(e)}
+    if body is None:
+        return None, None
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return 400, {"error": "Request body is not valid JSON."}
+
+    try:
+        text = validate_text(data.get("text") if isinstance(data, dict) else None)
+    except ValueError as e:
+        return 400, {"error": str(e)}
+
+    try:
+        pred = await batcher.submit(text)
+    except Exception:
+        return 500, {"error": "Classification failed. Please try again."}
+    return 200, prediction_to_dict(pred, datetime.utcnow().isoformat())
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            migrate()
+            warm_up()
+            watch_for_new_models()
+            batcher.start()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await batcher.stop()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+# ASGI application: the classify endpoint goes through the micro-batcher;
+# /health and /metrics match the Flask app. Everything else lives in api/app.py.
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await lifespan(receive, send)
+    if scope["type"] != "http":
+        return
+
+    start = time.perf_counter()
+    route, method = scope["path"], scope["method"]
+
+    if route == "/classify-complaint" and method == "POST":
+        status, body = await classify_complaint(scope, receive)
+        if status is None:
+            return      # client went away
+    elif route == "/health" and method == "GET":
+        status, body = 200, {"status": "ok", "timestamp": datetime.utcnow().isoformat(),
+                             "model_version": get_model_version()}
+    elif route == "/metrics" and method == "GET":
+        return await send_response(send, 200, metrics.render().encode("utf-8"), metrics.CONTENT_TYPE)
+    elif route in ("/classify-complaint", "/health"):
+        status, body = 405, {"error": "Method not allowed."}
+    else:
+        route = "unmatched"
+        status, body = 404, {"error": "Not found."}
+
+    await send_response(send, status, body)
+    REQUEST_SECONDS.labels(route).observe(time.perf_counter() - start)
+    REQUESTS.labels(route, status).inc()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-batching ASGI server for the classify endpoint.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH, help="Requests per model call")
+    parser.add_argument("--wait-ms", type=float, default=MAX_WAIT * 1000, help="Batching window in milliseconds")
+    args = parser.parse_args()
+
+    try:
+        import uvicorn
+    except ImportError:
+        sys.exit("The micro-batching server needs an ASGI server: pip install uvicorn")
+
+    batcher.max_batch = args.max_batch
+    batcher.max_wait  = args.wait_ms / 1000
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
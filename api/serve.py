@@ -0,0 +1,183 @@
+import os
+import gc
+import sys
+import time
+import random
+import signal
+import socket
+import argparse
+import traceback
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../src"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../database"))
+
+from threadpoolctl import threadpool_limits
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+from db import close_connections, migrate
+from predict import warm_up, watch_for_new_models
+from app import app
+
+WORKERS          = os.cpu_count() or 1
+MAX_REQUESTS     = 10_000   #Requests a worker serves before it is replaced (0 = never)
+MAX_JITTER       = 1_000    #Random extra requests per worker so they do not all recycle at once
+BLAS_THREADS     = 1        #NumPy/BLAS threads per worker — workers x threads should not exceed cores
+GRACEFUL_TIMEOUT = 30       #Seconds a stopping worker gets to finish before SIGKILL
+SIGNALS          = {signal.SIGTERM, signal.SIGINT, signal.SIGHUP}     #Handled differently by parent and workers
+POLL_INTERVAL    = 1.0      #Seconds between a worker's checks for shutdown / a dead parent
+
+# Prefork production server:
+#   parent   migrates the schema, loads the model, NLTK data and VADER, closes
+#            its SQLite connections, freezes the GC heap, binds the socket, then
+#            forks the workers — the loaded objects are shared copy-on-write
+#            instead of loaded once per worker
+#   workers  cap BLAS threads, accept on the shared socket one request at a
+#            time, and exit after max_requests (+ jitter) or on SIGTERM,
+#            finishing the current request and flushing write-behind rows
+#   parent   replaces any worker that exits; SIGTERM/SIGINT stop everything,
+#            SIGHUP recycles every worker one at a time
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def worker_main(sock, host, port, max_requests, jitter, blas_threads):
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)     # the parent handles Ctrl-C
+    signal.signal(signal.SIGHUP, signal.SIG_DFL)
+    signal.pthread_sigmask(signal.SIG_UNBLOCK, SIGNALS)
+
+    threadpool_limits(limits=blas_threads)
+    watch_for_new_models()
+    parent = os.getppid()
+
+    served = 0
+    def counted(environ, start_response):
+        nonlocal served
+        served += 1
+        def start(status, headers, exc_info=None):
+            return start_response(status, headers + [("X-Worker-Pid", str(os.getpid()))], exc_info)
+        return app(environ, start)
+
+    server = BaseWSGIServer(host, port, counted, handler=QuietHandler, fd=sock.fileno())
+    server.timeout = POLL_INTERVAL
+    limit = max_requests + random.randint(0, jitter) if max_requests else None
+
+    while not stopping and (limit is None or served < limit) and os.getppid() == parent:
+        server.handle_request()
+
+    server.server_close()
+    sys.exit(0)     # runs atexit handlers: write-behind flush, DB connections
+
+
+# Signals stay blocked across the fork until the worker has installed its own
+# handlers, so none reaches a child still running the parent's
+def spawn(sock, host, port, max_requests, jitter, blas_threads):
+    signal.pthread_sigmask(signal.SIG_BLOCK, SIGNALS)
+    pid = os.fork()
+    if pid != 0:
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, SIGNALS)
+    else:
+        try:
+            worker_main(sock, host, port, max_requests, jitter, blas_threads)
+        except SystemExit:
+            raise           # unwinds to a normal interpreter exit, so atexit handlers run
+        except BaseException:
+            traceback.print_exc()
+            os._exit(1)     # never fall back into the parent's loop
+    return pid
+
+
+def serve(host="0.0.0.0", port=5000, workers=WORKERS, max_requests=MAX_REQUESTS,
+          jitter=MAX_JITTER, blas_threads=BLAS_THREADS):
+    migrate()
+    warm_up()
+    close_connections()     # workers must open their own SQLite connections, never share the parent's
+    gc.collect()
+    gc.freeze()         # keep the GC from touching (and copying) the shared heap in workers
+
+    sock = socket.create_server((host, port), backlog=2048)
+    sock.setblocking(False)     # idle workers all wake on a connection; the losers must not block in accept
+    host, port = sock.getsockname()[:2]
+
+    # Handlers go in before the first fork: a SIGTERM during startup must still
+    # stop the workers already spawned instead of killing only the parent
+    state = {"stopping": False, "recycle": False}
+    signal.signal(signal.SIGTERM, lambda *_: state.update(stopping=True))
+    signal.signal(signal.SIGINT, lambda *_: state.update(stopping=True))
+    signal.signal(signal.SIGHUP, lambda *_: state.update(recycle=True))
+
+    children = set()
+    for _ in range(workers):
+        if state["stopping"]:
+            break
+        children.add(spawn(sock, host, port, max_requests, jitter, blas_threads))
+    print(f"Serving on http://{host}:{port} with {workers} workers (pid {os.getpid()})", flush=True)
+
+    while not state["stopping"]:
+        if state["recycle"]:
+            state["recycle"] = False
+            _recycle(children, sock, host, port, max_requests, jitter, blas_threads)
+
+        while children:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                break
+            children.discard(pid)
+            if not state["stopping"]:
+                children.add(spawn(sock, host, port, max_requests, jitter, blas_threads))
+        time.sleep(0.2)
+
+    _stop_all(children)
+    sock.close()
+
+
+# Replace workers one at a time so capacity never drops by more than one
+def _recycle(children, sock, host, port, max_requests, jitter, blas_threads):
+    for pid in list(children):
+        _stop_all({pid})
+        children.discard(pid)
+        children.add(spawn(sock, host, port, max_requests, jitter, blas_threads))
+
+
+def _stop_all(pids):
+    for pid in pids:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+    deadline = time.monotonic() + GRACEFUL_TIMEOUT
+    remaining = set(pids)
+    while remaining and time.monotonic() < deadline:
+        for pid in list(remaining):
+            if os.waitpid(pid, os.WNOHANG)[0] == pid:
+                remaining.discard(pid)
+        time.sleep(0.1)
+
+    for pid in remaining:
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prefork production server for the classification API.")
+    parser.add_argument("--bind", default="0.0.0.0:5000", help="host:port to listen on")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="Worker processes (default: all cores)")
+    parser.add_argument("--max-requests", type=int, default=MAX_REQUESTS,
+                        help="Recycle a worker after this many requests (0 = never)")
+    parser.add_argument("--max-requests-jitter", type=int, default=MAX_JITTER,
+                        help="Up to this many extra requests per worker, chosen at random")
+    parser.add_argument("--blas-threads", type=int, default=BLAS_THREADS, help="NumPy/BLAS threads per worker")
+    args = parser.parse_args()
+
+    host, port = args.bind.rsplit(":", 1)
+    serve(host, int(port), args.workers, args.max_requests, args.max_requests_jitter, args.blas_threads)
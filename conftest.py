@@ -0,0 +1,61 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "database"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
+
+import db
+import registry
+from preprocessor import clean_many
+from train import build_joint_model
+
+
+# The manual dataset, raw and cleaned — small enough to train on in a second
+@pytest.fixture(scope="session")
+def training_data():
+    df = pd.read_csv(os.path.join(os.path.dirname(__file__), "data", "complaints.csv"))
+    return df, clean_many(df["complaint_text"])
+
+
+@pytest.fixture(scope="session")
+def trained_model(training_data):
+    df, cleans = training_data
+    return build_joint_model(cleans, df["category"], df["priority"])
+
+
+# Every test classifies against a model published into a temporary models
+# directory, never against whatever happens to be in models/. MODELS_DIR is
+# exported too, so servers and scripts started as subprocesses use it.
+@pytest.fixture(scope="session", autouse=True)
+def models_dir(tmp_path_factory, trained_model):
+    path = str(tmp_path_factory.mktemp("models"))
+    saved_dir, saved_env = registry.MODELS_DIR, os.environ.get("MODELS_DIR")
+    registry.MODELS_DIR = os.environ["MODELS_DIR"] = path
+    registry.publish(trained_model, note="test session")
+    try:
+        yield path
+    finally:
+        registry.MODELS_DIR = saved_dir
+        if saved_env is None:
+            os.environ.pop("MODELS_DIR", None)
+        else:
+            os.environ["MODELS_DIR"] = saved_env
+
+
+# A migrated complaints database in a temporary directory. The module-level
+# DB_PATH and connection pool are put back afterwards, so tests do not depend
+# on the order they run in.
+@pytest.fixture
+def temp_db(tmp_path):
+    saved_path = db.DB_PATH
+    db.close_connections()
+    db.DB_PATH = str(tmp_path / "complaints.db")
+    db.migrate()
+    try:
+        yield db
+    finally:
+        db.close_connections()
+        db.DB_PATH = saved_path
@@ -1,12 +1,29 @@
 import sys
 import os
+import json
+import hashlib
+from functools import lru_cache
+from datetime import datetime, timezone
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../database"))
 
-from flask import Flask, render_template_string
-from db import get_all_complaints, get_category_counts, get_priority_counts, get_high_priority_trend
+from flask import Flask, Response, render_template_string, request, url_for
+from markupsafe import Markup, escape
+from db import (get_recent_complaints, count_complaints, get_category_counts,
+                get_priority_counts, get_high_priority_trend, get_complaints_version,
+                search_complaints, search_time_bound, migrate)
 
 app = Flask(__name__)
 
+PAGE_SIZE     = 50      #Complaints per page
+MAX_PAGE_SIZE = 200
+CATEGORIES    = ["Billing", "Technical", "Delivery", "Account", "Other"]
+PRIORITIES    = ["High", "Medium", "Low"]
+
+REFRESH_SECONDS     = 10       #How often the page polls the JSON endpoints
+RESPONSE_CACHE_SIZE = 256      #Cached JSON bodies (endpoint x query string x data version)
+QUERY_ARGS          = ("category", "priority", "rule_override", "limit", "before", "after")
+COMPLAINT_FIELDS    = ("id", "complaint_text", "category", "priority", "rule_override", "classified_at")
+
 # Simple HTML template for the dashboard
 HTML = """
 <!DOCTYPE html>
@@ -42,46 +59,55 @@ HTML = """
         }
         .rule-yes { background: #ffe0e0; color: #c0392b; }
         .rule-no  { background: #e0f0e0; color: #27ae60; }
+        .filters { margin-bottom: 15px; }
+        .filters select, .filters button { padding: 4px 8px; margin-right: 8px; }
+        .pager { margin: 15px 0; }
+        .pager a { margin-right: 20px; color: #2c7be5; }
     </style>
 </head>
 <body>
     <h1>Complaint Classifier Dashboard</h1>
+    <p><a href="{{ url_for('search') }}">Search complaints</a></p>
 
     <!-- Summary Cards -->
-    <div class="cards">
-        <div class="card">
-            <h3>{{ total }}</h3>
-            <p>Total Complaints</p>
-        </div>
-        {% for priority, count in priority_counts %}
-        <div class="card">
-            <h3 class="{{ priority }}">{{ count }}</h3>
-            <p>{{ priority }} Priority</p>
-        </div>
-        {% endfor %}
-    </div>
+    <div class="cards" id="cards"></div>
 
     <!-- Category Breakdown -->
     <h2>Complaints by Category</h2>
-    <table>
+    <table id="categories">
         <tr><th>Category</th><th>Count</th></tr>
-        {% for category, count in category_counts %}
-        <tr><td>{{ category }}</td><td>{{ count }}</td></tr>
-        {% endfor %}
     </table>
 
     <!-- High Priority Trend -->
     <h2>High Priority Trend</h2>
-    <table>
+    <table id="trend">
         <tr><th>Date</th><th>High Priority Count</th></tr>
-        {% for day, count in trend %}
-        <tr><td>{{ day }}</td><td>{{ count }}</td></tr>
-        {% endfor %}
     </table>
 
     <!-- Recent Complaints -->
     <h2>Recent Complaints</h2>
-    <table>
+    <form class="filters" method="get">
+        <select name="category">
+            <option value="">All categories</option>
+            {% for c in categories %}
+            <option value="{{ c }}">{{ c }}</option>
+            {% endfor %}
+        </select>
+        <select name="priority">
+            <option value="">All priorities</option>
+            {% for p in priorities %}
+            <option value="{{ p }}">{{ p }}</option>
+            {% endfor %}
+        </select>
+        <select name="rule_override">
+            <option value="">Any rule override</option>
+            <option value="1">Rule override</option>
+            <option value="0">No rule override</option>
+        </select>
+        <button type="submit">Filter</button>
+        <span id="matching"></span> matching
+    </form>
+    <table id="complaints">
         <tr>
             <th>#</th>
             <th>Complaint</th>
@@ -90,45 +116,336 @@ HTML = """
             <th>Rule Override</th>
             <th>Time</th>
         </tr>
-        {% for row in complaints %}
+    </table>
+    <div class="pager">
+        <a id="newer" hidden>&larr; Newer</a>
+        <a id="older" hidden>Older &rarr;</a>
+    </div>
+
+    <script>
+        // The page is a static shell: data comes from the cached JSON endpoints,
+        // polled with conditional requests so an unchanged poll is a 304.
+        const REFRESH_MS = {{ refresh_seconds * 1000 }};
+        const params     = new URLSearchParams(location.search);
+        const form       = document.querySelector(".filters");
+        for (const [key, value] of params) {
+            if (form.elements[key]) form.elements[key].value = value;
+        }
+
+        async function getJSON(url) {
+            const response = await fetch(url, {cache: "no-cache"});
+            return response.json();
+        }
+
+        function cell(row, text, className) {
+            const td = row.insertCell();
+            td.textContent = text;
+            if (className) td.className = className;
+            return td;
+        }
+
+        function fillTable(id, rows) {
+            const table = document.getElementById(id);
+            while (table.rows.length > 1) table.deleteRow(1);
+            for (const values of rows) {
+                const row = table.insertRow();
+                values.forEach(v => cell(row, v));
+            }
+        }
+
+        function pageLink(id, cursor, value) {
+            const link = document.getElementById(id);
+            link.hidden = value === null;
+            if (value === null) return;
+            const query = new URLSearchParams(params);
+            query.delete("before");
+            query.delete("after");
+            query.set(cursor, value);
+            link.href = "?" + query;
+        }
+
+        async function refresh() {
+            const [summary, counts, trend, page] = await Promise.all([
+                getJSON("{{ url_for('api_summary') }}"),
+                getJSON("{{ url_for('api_counts') }}"),
+                getJSON("{{ url_for('api_trend') }}"),
+                getJSON("{{ url_for('api_complaints') }}?" + params),
+            ]);
+
+            const cards = document.getElementById("cards");
+            cards.innerHTML = "";
+            const card = (value, label, className) => {
+                const div = document.createElement("div");
+                div.className = "card";
+                const h3 = document.createElement("h3");
+                h3.textContent = value;
+                if (className) h3.className = className;
+                const p = document.createElement("p");
+                p.textContent = label;
+                div.append(h3, p);
+                cards.append(div);
+            };
+            card(summary.total, "Total Complaints");
+            for (const [priority, count] of Object.entries(summary.priorities)) {
+                card(count, priority + " Priority", priority);
+            }
+
+            fillTable("categories", Object.entries(counts.categories));
+            fillTable("trend", trend.map(t => [t.day, t.count]));
+
+            document.getElementById("matching").textContent = page.matching;
+            const table = document.getElementById("complaints");
+            while (table.rows.length > 1) table.deleteRow(1);
+            for (const c of page.complaints) {
+                const row = table.insertRow();
+                cell(row, c.id);
+                cell(row, c.complaint_text.length > 80 ? c.complaint_text.slice(0, 80) + "..." : c.complaint_text);
+                cell(row, c.category);
+                cell(row, c.priority, c.priority);
+                const badge = document.createElement("span");
+                badge.className = "badge " + (c.rule_override ? "rule-yes" : "rule-no");
+                badge.textContent = c.rule_override ? "Yes" : "No";
+                row.insertCell().append(badge);
+                cell(row, c.classified_at.slice(0, 19));
+            }
+            pageLink("newer", "after", page.newer);
+            pageLink("older", "before", page.older);
+        }
+
+        refresh();
+        setInterval(refresh, REFRESH_MS);
+    </script>
+</body>
+</html>
+"""
+
+SEARCH_HTML = """
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Search Complaints</title>
+    <style>
+        body { font-family: Arial, sans-serif; margin: 40px; background: #f5f5f5; }
+        h1 { color: #333; }
+        form select, form input, form button { padding: 4px 8px; margin-right: 8px; }
+        table {
+            width: 100%; border-collapse: collapse; margin-top: 20px;
+            background: white; box-shadow: 0 2px 6px rgba(0,0,0,0.1);
+        }
+        th { background: #2c7be5; color: white; padding: 12px 16px; text-align: left; }
+        td { padding: 10px 16px; border-bottom: 1px solid #eee; }
+        mark { background: #fff3b0; }
+        .High { color: #e63946; font-weight: bold; }
+        .Medium { color: #f4a261; font-weight: bold; }
+        .Low { color: #2a9d8f; font-weight: bold; }
+        .pager { margin: 15px 0; }
+        .pager a { margin-right: 20px; color: #2c7be5; }
+    </style>
+</head>
+<body>
+    <h1>Search Complaints</h1>
+    <p><a href="{{ url_for('dashboard') }}">&larr; Dashboard</a></p>
+    <form method="get">
+        <input name="q" value="{{ args.q or '' }}" placeholder='refund, "charged twice", bill*' size="40" autofocus>
+        <select name="category">
+            <option value="">All categories</option>
+            {% for c in categories %}
+            <option value="{{ c }}" {% if args.category == c %}selected{% endif %}>{{ c }}</option>
+            {% endfor %}
+        </select>
+        <select name="priority">
+            <option value="">All priorities</option>
+            {% for p in priorities %}
+            <option value="{{ p }}" {% if args.priority == p %}selected{% endif %}>{{ p }}</option>
+            {% endfor %}
+        </select>
+        From <input type="date" name="since" value="{{ args.since or '' }}">
+        to <input type="date" name="until" value="{{ args.until or '' }}">
+        <button type="submit">Search</button>
+    </form>
+
+    {% if args.q %}
+    <p>{{ total }} matching complaint{{ "" if total == 1 else "s" }}</p>
+    <table>
+        <tr><th>#</th><th>Complaint</th><th>Category</th><th>Priority</th><th>Time</th></tr>
+        {% for r in results %}
         <tr>
-            <td>{{ row[0] }}</td>
-            <td>{{ row[1][:80] }}{% if row[1]|length > 80 %}...{% endif %}</td>
-            <td>{{ row[2] }}</td>
-            <td class="{{ row[3] }}">{{ row[3] }}</td>
-            <td>
-                {% if row[4] %}
-                <span class="badge rule-yes">Yes</span>
-                {% else %}
-                <span class="badge rule-no">No</span>
-                {% endif %}
-            </td>
-            <td>{{ row[5][:19] }}</td>
+            <td>{{ r.id }}</td>
+            <td>{{ r.snippet }}</td>
+            <td>{{ r.category }}</td>
+            <td class="{{ r.priority }}">{{ r.priority }}</td>
+            <td>{{ r.classified_at[:19] }}</td>
         </tr>
         {% endfor %}
     </table>
+    <div class="pager">
+        {% if prev_url %}<a href="{{ prev_url }}">&larr; Better matches</a>{% endif %}
+        {% if next_url %}<a href="{{ next_url }}">More matches &rarr;</a>{% endif %}
+    </div>
+    {% endif %}
 </body>
 </html>
 """
 
-# Dashboard route
+# Filters and paging cursor for the complaints endpoint, from the query string
+def complaints_query(args):
+    filters = {
+        "category"     : args.get("category") or None,
+        "priority"     : args.get("priority") or None,
+        "rule_override": {"1": True, "0": False}.get(args.get("rule_override")),
+    }
+    limit = max(1, min(_int(args.get("limit")) or PAGE_SIZE, MAX_PAGE_SIZE))
+    return filters, limit, _int(args.get("before")), _int(args.get("after"))
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def summary_data(args):
+    return {"total": count_complaints(), "priorities": dict(get_priority_counts())}
+
+
+def counts_data(args):
+    return {"categories": dict(get_category_counts()), "priorities": dict(get_priority_counts())}
+
+
+def trend_data(args):
+    return [{"day": day, "count": count} for day, count in get_high_priority_trend()]
+
+
+# One page of complaints, newest first, with the ids to pass as after= / before=
+# for the newer and older pages (null when there is no such page)
+def complaints_data(args):
+    filters, limit, before, after = complaints_query(args)
+
+    # Fetch one extra row to know whether another page exists past this one
+    complaints = get_recent_complaints(limit + 1, before_id=before, after_id=after, **filters)
+    has_more   = len(complaints) > limit
+    if after is not None:
+        complaints = complaints[1:] if has_more else complaints
+    else:
+        complaints = complaints[:limit]
+
+    has_newer = before is not None or (after is not None and has_more)
+    has_older = after is not None or has_more
+
+    return {
+        "complaints": [dict(zip(COMPLAINT_FIELDS, row)) for row in complaints],
+        "matching"  : count_complaints(**filters),
+        "newer"     : complaints[0][0] if complaints and has_newer else None,
+        "older"     : complaints[-1][0] if complaints and has_older else None,
+    }
+
+
+ENDPOINTS = {
+    "summary"   : summary_data,
+    "counts"    : counts_data,
+    "trend"     : trend_data,
+    "complaints": complaints_data,
+}
+
+
+# Serialized JSON body and its ETag per (change counter, endpoint, query).
+# Any write to complaints bumps the counter, so entries for older versions are
+# never read again and age out of the LRU.
+@lru_cache(maxsize=RESPONSE_CACHE_SIZE)
+def cached_body(version, endpoint, args):
+    body = json.dumps(ENDPOINTS[endpoint](dict(args))).encode("utf-8")
+    return body, hashlib.sha1(body).hexdigest()
+
+
+# Serve an endpoint from the cache. The ETag is a hash of the body and
+# Last-Modified is the counter's timestamp, so an unchanged poll gets a 304
+# after one single-row lookup.
+def cached_json(endpoint):
+    version, changed_at = get_complaints_version()
+    args = tuple(sorted((k, v) for k, v in request.args.items() if k in QUERY_ARGS))
+    body, etag = cached_body(version, endpoint, args)
+
+    response = Response(body, mimetype="application/json")
+    response.set_etag(etag)
+    if changed_at:
+        response.last_modified = datetime.strptime(changed_at, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+    response.cache_control.no_cache = True      # browsers revalidate every poll
+    return response.make_conditional(request)
+
+
+@app.route("/api/summary")
+def api_summary():
+    return cached_json("summary")
+
+
+@app.route("/api/counts")
+def api_counts():
+    return cached_json("counts")
+
+
+@app.route("/api/trend")
+def api_trend():
+    return cached_json("trend")
+
+
+@app.route("/api/complaints")
+def api_complaints():
+    return cached_json("complaints")
+
+
+# Full-text search page. Snippets come back with control-character markers
+# around the matched terms, so the text can be escaped before the markers
+# become <mark> tags.
+@app.route("/search")
+def search():
+    args   = {key: request.args.get(key) for key in ("q", "category", "priority", "since", "until") if request.args.get(key)}
+    offset = max(0, request.args.get("offset", 0, type=int))
+    # A date that does not parse is dropped, like any other bad filter
+    bounds = {}
+    for key in ("since", "until"):
+        if key in args:
+            try:
+                bounds[key] = search_time_bound(args[key], until=key == "until")
+            except ValueError:
+                del args[key]
+
+    total, results = 0, []
+    if args.get("q"):
+        total, results = search_complaints(
+            args["q"], category=args.get("category"), priority=args.get("priority"),
+            since=bounds.get("since"), until=bounds.get("until"), limit=PAGE_SIZE, offset=offset,
+            highlight=("\x02", "\x03"),
+        )
+        for r in results:
+            r["snippet"] = escape(r["snippet"]).replace("\x02", Markup("<mark>")).replace("\x03", Markup("</mark>"))
+
+    prev_url = url_for("search", offset=max(0, offset - PAGE_SIZE), **args) if offset else None
+    next_url = url_for("search", offset=offset + PAGE_SIZE, **args) if offset + PAGE_SIZE < total else None
+
+    return render_template_string(
+        SEARCH_HTML,
+        args       = args,
+        total      = total,
+        results    = results,
+        categories = CATEGORIES,
+        priorities = PRIORITIES,
+        prev_url   = prev_url,
+        next_url   = next_url,
+    )
+
+
+# Dashboard route — a static shell; the data comes from the JSON endpoints
 @app.route("/")
 def dashboard():
-    complaints      = get_all_complaints()
-    category_counts = get_category_counts()
-    priority_counts = get_priority_counts()
-    trend           = get_high_priority_trend()
-    total           = len(complaints)
-
     return render_template_string(
         HTML,
-        complaints      = complaints,
-        category_counts = category_counts,
-        priority_counts = priority_counts,
-        trend           = trend,
-        total           = total,
+        categories      = CATEGORIES,
+        priorities      = PRIORITIES,
+        refresh_seconds = REFRESH_SECONDS,
     )
 
 
 if __name__ == "__main__":
-    app.run(debug=True, host="0.0.0.0", port=5001)
\ No newline at end of file
+    migrate()
+    app.run(debug=True, host="0.0.0.0", port=5001)
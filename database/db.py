@@ -1,156 +1,775 @@
 import sqlite3
 import os
-from datetime import datetime
+import re
+import sys
+import time
+import queue
+import argparse
+import atexit
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
 
-DB_PATH = os.path.join(os.path.dirname(__file__), "complaints.db")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../src"))
+import metrics
+
+DB_PATH      = os.environ.get("COMPLAINTS_DB", os.path.join(os.path.dirname(__file__), "complaints.db"))
+POOL_SIZE    = 8        #Idle connections kept for reuse
+BUSY_TIMEOUT = 30       #Seconds to wait on a locked database before raising
+
+# Applied to every new connection. WAL lets the dashboard read while the API
+# writes; synchronous=NORMAL is durable under WAL except on power loss.
+PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-20000",         # ~20 MB page cache
+    "PRAGMA mmap_size=268435456",       # 256 MB memory-mapped I/O
+    "PRAGMA temp_store=MEMORY",
+]
+
+# Exported on the API's /metrics endpoint
+DB_WRITE_SECONDS = metrics.histogram("db_write_seconds", "Database write transaction latency", ["operation"])
+DB_WRITE_ERRORS  = metrics.counter("db_write_errors_total", "Database writes that raised", ["operation"])
+DB_ROWS_WRITTEN  = metrics.counter("db_rows_written_total", "Rows committed", ["operation"])
 
 # Database helper functions
 def get_connection():
-    return sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT, check_same_thread=False)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+# Small LIFO pool of open connections shared by all threads. A connection is
+# used by one thread at a time; LIFO keeps the warmest connection in use.
+_pool      = queue.LifoQueue(maxsize=POOL_SIZE)
+_pool_pid  = os.getpid()
+_inherited = []     # pools copied from the parent by fork, kept referenced so they are never closed here
+
+# A forked child must not use or close the parent's connections: closing one
+# can checkpoint or remove the WAL the parent is still writing to
+def _check_fork():
+    global _pool, _pool_pid
+    if _pool_pid != os.getpid():
+        _inherited.append(_pool)
+        _pool, _pool_pid = queue.LifoQueue(maxsize=POOL_SIZE), os.getpid()
+
+@contextmanager
+def connection():
+    _check_fork()
+
+    try:
+        conn = _pool.get_nowait()
+    except queue.Empty:
+        conn = get_connection()
+
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        try:
+            _pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+# Close every idle pooled connection of this process — runs at interpreter shutdown
+def close_connections():
+    _check_fork()
+    while True:
+        try:
+            _pool.get_nowait().close()
+        except queue.Empty:
+            break
+
+atexit.register(close_connections)
+
+# Time one write transaction and count it as an error if it raises
+@contextmanager
+def _timed_write(operation, rows=1):
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        DB_WRITE_ERRORS.labels(operation).inc()
+        raise
+    DB_WRITE_SECONDS.labels(operation).observe(time.perf_counter() - start)
+    DB_ROWS_WRITTEN.labels(operation).inc(rows)
 
 # Initialize the database and create the complaints table if it doesn't exist
 def init_db():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS complaints (
-            id               INTEGER PRIMARY KEY AUTOINCREMENT,
-            complaint_text   TEXT NOT NULL,
-            category         TEXT NOT NULL,
-            priority         TEXT NOT NULL,
-            rule_override    INTEGER NOT NULL,
-            classified_at    TEXT NOT NULL
-        )
-    """)
-    conn.commit()
-    conn.close()
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS complaints (
+                id               INTEGER PRIMARY KEY AUTOINCREMENT,
+                complaint_text   TEXT NOT NULL,
+                category         TEXT NOT NULL,
+                priority         TEXT NOT NULL,
+                rule_override    INTEGER NOT NULL,
+                classified_at    TEXT NOT NULL
+            )
+        """)
+        # Each filter index ends in id so a filtered, newest-first page is a
+        # range scan on one index instead of a sort of the whole table
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_complaints_category ON complaints (category, id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_complaints_priority ON complaints (priority, id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_complaints_rule_override ON complaints (rule_override, id)")
+        conn.commit()
+
+# Hourly counts of complaints by category x priority x rule_override.
+# Kept current by triggers on every insert/update/delete — whichever code path writes —
+# so dashboard aggregates read a few rows per hour instead of the whole table.
+def init_rollups():
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'complaint_rollup_hourly'")
+        existed = cursor.fetchone() is not None
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS complaint_rollup_hourly (
+                bucket          TEXT NOT NULL,     -- 'YYYY-MM-DDTHH', UTC
+                category        TEXT NOT NULL,
+                priority        TEXT NOT NULL,
+                rule_override   INTEGER NOT NULL,
+                count           INTEGER NOT NULL,
+                PRIMARY KEY (bucket, category, priority, rule_override)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_complaints_rollup_insert
+            AFTER INSERT ON complaints
+            BEGIN
+                INSERT INTO complaint_rollup_hourly (bucket, category, priority, rule_override, count)
+                VALUES (substr(NEW.classified_at, 1, 13), NEW.category, NEW.priority, NEW.rule_override, 1)
+                ON CONFLICT (bucket, category, priority, rule_override) DO UPDATE SET count = count + 1;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_complaints_rollup_delete
+            AFTER DELETE ON complaints
+            BEGIN
+                UPDATE complaint_rollup_hourly SET count = count - 1
+                WHERE bucket = substr(OLD.classified_at, 1, 13)
+                  AND category = OLD.category
+                  AND priority = OLD.priority
+                  AND rule_override = OLD.rule_override;
+            END
+        """)
+        # A row whose bucket or dimensions change moves from the old count to the new
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_complaints_rollup_update
+            AFTER UPDATE OF category, priority, rule_override, classified_at ON complaints
+            BEGIN
+                UPDATE complaint_rollup_hourly SET count = count - 1
+                WHERE bucket = substr(OLD.classified_at, 1, 13)
+                  AND category = OLD.category
+                  AND priority = OLD.priority
+                  AND rule_override = OLD.rule_override;
+                INSERT INTO complaint_rollup_hourly (bucket, category, priority, rule_override, count)
+                VALUES (substr(NEW.classified_at, 1, 13), NEW.category, NEW.priority, NEW.rule_override, 1)
+                ON CONFLICT (bucket, category, priority, rule_override) DO UPDATE SET count = count + 1;
+            END
+        """)
+        conn.commit()
+
+    # First run against an existing database — count the rows already there
+    if not existed:
+        backfill_rollups()
+
+# Rebuild the rollup table from the complaints table in one transaction
+def backfill_rollups():
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM complaint_rollup_hourly")
+        cursor.execute("""
+            INSERT INTO complaint_rollup_hourly (bucket, category, priority, rule_override, count)
+            SELECT substr(classified_at, 1, 13), category, priority, rule_override, COUNT(*)
+            FROM complaints
+            GROUP BY 1, 2, 3, 4
+        """)
+        conn.commit()
+        cursor.execute("SELECT COUNT(*) FROM complaint_rollup_hourly")
+        buckets = cursor.fetchone()[0]
+    return buckets
+
+# Single-row counter bumped by triggers on every insert, update and delete of
+# complaints. Readers (the dashboard's response cache) compare it to tell
+# whether anything changed without touching the complaints table.
+def init_change_counter():
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS complaint_changes (
+                id          INTEGER PRIMARY KEY CHECK (id = 1),
+                version     INTEGER NOT NULL,
+                changed_at  TEXT NOT NULL      -- 'YYYY-MM-DD HH:MM:SS', UTC
+            )
+        """)
+        cursor.execute("INSERT OR IGNORE INTO complaint_changes (id, version, changed_at) VALUES (1, 0, datetime('now'))")
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_complaints_changes_{event.lower()}
+                AFTER {event} ON complaints
+                BEGIN
+                    UPDATE complaint_changes SET version = version + 1, changed_at = datetime('now') WHERE id = 1;
+                END
+            """)
+        conn.commit()
+
+# (version, changed_at) of the complaints table — version only ever grows
+def get_complaints_version():
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT version, changed_at FROM complaint_changes WHERE id = 1")
+        row = cursor.fetchone()
+    return row or (0, None)
+
+# Full-text index over complaint_text. An external-content FTS5 table: it
+# stores only the index and reads the text back from complaints, kept in sync
+# by triggers. Porter stemming lets "charged" match "charge" and "charges".
+def init_search():
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'complaints_fts'")
+        existed = cursor.fetchone() is not None
+
+        cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS complaints_fts USING fts5(
+                complaint_text,
+                content       = 'complaints',
+                content_rowid = 'id',
+                tokenize      = 'porter unicode61'
+            )
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_complaints_fts_insert
+            AFTER INSERT ON complaints
+            BEGIN
+                INSERT INTO complaints_fts (rowid, complaint_text) VALUES (NEW.id, NEW.complaint_text);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_complaints_fts_delete
+            AFTER DELETE ON complaints
+            BEGIN
+                INSERT INTO complaints_fts (complaints_fts, rowid, complaint_text)
+                VALUES ('delete', OLD.id, OLD.complaint_text);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_complaints_fts_update
+            AFTER UPDATE OF complaint_text ON complaints
+            BEGIN
+                INSERT INTO complaints_fts (complaints_fts, rowid, complaint_text)
+                VALUES ('delete', OLD.id, OLD.complaint_text);
+                INSERT INTO complaints_fts (rowid, complaint_text) VALUES (NEW.id, NEW.complaint_text);
+            END
+        """)
+        conn.commit()
+
+    # First run against an existing database — index the rows already there
+    if not existed:
+        rebuild_search_index()
+
+# Re-index every complaint from scratch, then merge the index into one b-tree
+def rebuild_search_index():
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO complaints_fts (complaints_fts) VALUES ('rebuild')")
+        cursor.execute("INSERT INTO complaints_fts (complaints_fts) VALUES ('optimize')")
+        conn.commit()
+        cursor.execute("SELECT COUNT(*) FROM complaints")
+        rows = cursor.fetchone()[0]
+    return rows
+
+# Turn free text into an FTS5 query that cannot raise a syntax error: "quoted
+# phrases" stay phrases, other words become terms (a trailing * keeps a prefix
+# match), and everything is ANDed. Returns None when nothing searchable is left.
+def fts_query(text):
+    parts = []
+    for phrase, word, star in re.findall(r'"([^"]*)"|(\w+)(\*?)', text or ""):
+        if phrase.strip():
+            parts.append('"' + " ".join(re.findall(r"\w+", phrase)) + '"')
+        elif word:
+            parts.append(f'"{word}"{star}')
+    return " ".join(p for p in parts if p != '""') or None
+
+# A since/until value from a request, as the naive UTC ISO text classified_at
+# is stored in, so the text comparison in search_complaints orders correctly.
+# Accepts any ISO date or datetime (compact, space-separated, with an offset).
+# A date on its own covers that whole day: since starts at its midnight and
+# until, which is exclusive, at the next one. Raises ValueError.
+def search_time_bound(value, until=False):
+    try:
+        day = date.fromisoformat(value)
+    except ValueError:
+        moment = datetime.fromisoformat(value)
+        if moment.tzinfo is not None:
+            moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+        return moment.isoformat()
+    return datetime.combine(day + timedelta(days=1) if until else day, datetime.min.time()).isoformat()
+
+# Complaints matching a full-text query, best match first (bm25), with a
+# highlighted snippet of each. Filters and a date range (bounds in the form
+# search_time_bound returns, compared to classified_at; until is exclusive)
+# narrow the matches; limit/offset page through them. Returns (total_matches, results).
+def search_complaints(query, category=None, priority=None, since=None, until=None,
+                      limit=20, offset=0, highlight=("[", "]")):
+    match = fts_query(query)
+    if match is None:
+        return 0, []
+
+    clauses, params = _complaint_filters(category, priority)
+    clauses = [f"c.{clause}" for clause in clauses]
+    if since:
+        clauses.append("c.classified_at >= ?")
+        params.append(since)
+    if until:
+        clauses.append("c.classified_at < ?")
+        params.append(until)
+    where = "".join(f" AND {clause}" for clause in clauses)
+
+    # CROSS JOIN pins the join order: the index finds the matches, then each is
+    # looked up by id. Left to itself the planner can start from a filter index
+    # instead and evaluate MATCH once per row of the table.
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT COUNT(*)
+            FROM complaints_fts CROSS JOIN complaints c ON c.id = complaints_fts.rowid
+            WHERE complaints_fts MATCH ?{where}
+        """, [match] + params)
+        total = cursor.fetchone()[0]
+
+        cursor.execute(f"""
+            SELECT c.id, c.category, c.priority, c.rule_override, c.classified_at,
+                   snippet(complaints_fts, 0, ?, ?, '…', 16), rank
+            FROM complaints_fts CROSS JOIN complaints c ON c.id = complaints_fts.rowid
+            WHERE complaints_fts MATCH ?{where}
+            ORDER BY rank
+            LIMIT ? OFFSET ?
+        """, [*highlight, match] + params + [limit, offset])
+        rows = cursor.fetchall()
+
+    return total, [
+        {
+            "id"           : id_,
+            "category"     : category_,
+            "priority"     : priority_,
+            "rule_override": bool(rule_override),
+            "classified_at": classified_at,
+            "snippet"      : snippet,
+            "score"        : round(-rank, 6),      # bm25 is lower-is-better; flip it for display
+        }
+        for id_, category_, priority_, rule_override, classified_at, snippet, rank in rows
+    ]
 
 # CRUD operations
 def save_complaint(complaint_text, category, priority, rule_override):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO complaints (complaint_text, category, priority, rule_override, classified_at)
-        VALUES (?, ?, ?, ?, ?)
-    """, (
-        complaint_text,
-        category,
-        priority,
-        1 if rule_override else 0,
-        datetime.utcnow().isoformat()
-    ))
-    conn.commit()
-    conn.close()
+    save_complaints([(complaint_text, category, priority, rule_override)])
+
+# Bulk insert for batch classification — one transaction for the whole list
+def save_complaints(rows):
+    # rows = [(complaint_text, category, priority, rule_override), ...]
+    classified_at = datetime.utcnow().isoformat()
+    insert_complaint_rows([
+        (complaint_text, category, priority, rule_override, classified_at)
+        for complaint_text, category, priority, rule_override in rows
+    ])
+
+# Insert rows that already carry their classified_at timestamp, in one transaction.
+# Used directly by the write-behind queue, which stamps rows when they are queued.
+# progress=(source, rows_done) records how far a bulk import has got in the
+# same transaction, so the rows and the resume point can never disagree.
+def insert_complaint_rows(rows, progress=None):
+    # rows = [(complaint_text, category, priority, rule_override, classified_at), ...]
+    with _timed_write("insert_complaints", len(rows)), connection() as conn:
+        cursor = conn.cursor()
+        cursor.executemany("""
+            INSERT INTO complaints (complaint_text, category, priority, rule_override, classified_at)
+            VALUES (?, ?, ?, ?, ?)
+        """, [
+            (complaint_text, category, priority, 1 if rule_override else 0, classified_at)
+            for complaint_text, category, priority, rule_override, classified_at in rows
+        ])
+        if progress is not None:
+            cursor.execute("""
+                INSERT INTO bulk_import_progress (source, rows_done, updated_at) VALUES (?, ?, ?)
+                ON CONFLICT (source) DO UPDATE SET rows_done = excluded.rows_done, updated_at = excluded.updated_at
+            """, (*progress, datetime.utcnow().isoformat()))
+        conn.commit()
+
+# Input rows of a bulk import already committed to complaints (0 if none)
+def get_bulk_progress(source):
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT rows_done FROM bulk_import_progress WHERE source = ?", (source,))
+        row = cursor.fetchone()
+    return row[0] if row else 0
+
+def clear_bulk_progress(source):
+    with connection() as conn:
+        conn.execute("DELETE FROM bulk_import_progress WHERE source = ?", (source,))
+        conn.commit()
 
 # Query functions for dashboard
 def get_all_complaints():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM complaints ORDER BY id DESC")
-    rows = cursor.fetchall()
-    conn.close()
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM complaints ORDER BY id DESC")
+        rows = cursor.fetchall()
     return rows
 
+# WHERE clauses and parameters for the optional complaint filters
+def _complaint_filters(category=None, priority=None, rule_override=None):
+    clauses, params = [], []
+    if category is not None:
+        clauses.append("category = ?")
+        params.append(category)
+    if priority is not None:
+        clauses.append("priority = ?")
+        params.append(priority)
+    if rule_override is not None:
+        clauses.append("rule_override = ?")
+        params.append(1 if rule_override else 0)
+    return clauses, params
+
+# One page of complaints, newest first, using keyset pagination:
+#   before_id — the page of older rows ending just below this id
+#   after_id  — the page of newer rows starting just above this id
+# Cost depends on the page size, not on how deep the page is.
+def get_recent_complaints(limit=50, before_id=None, after_id=None,
+                          category=None, priority=None, rule_override=None):
+    clauses, params = _complaint_filters(category, priority, rule_override)
+    order = "DESC"
+    if before_id is not None:
+        clauses.append("id < ?")
+        params.append(before_id)
+    elif after_id is not None:
+        clauses.append("id > ?")
+        params.append(after_id)
+        order = "ASC"
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT * FROM complaints {where} ORDER BY id {order} LIMIT ?", params + [limit])
+        rows = cursor.fetchall()
+    if order == "ASC":
+        rows.reverse()
+    return rows
+
+# Number of complaints matching the filters, summed from the hourly rollup
+def count_complaints(category=None, priority=None, rule_override=None):
+    clauses, params = _complaint_filters(category, priority, rule_override)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT SUM(count) FROM complaint_rollup_hourly {where}", params)
+        row = cursor.fetchone()
+    return row[0] or 0
+
 # Get counts for categories and priorities
 def get_category_counts():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT category, COUNT(*) as count FROM complaints GROUP BY category")
-    rows = cursor.fetchall()
-    conn.close()
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT category, SUM(count) as count
+            FROM complaint_rollup_hourly
+            GROUP BY category
+            HAVING SUM(count) > 0
+        """)
+        rows = cursor.fetchall()
     return rows
 
 # Get counts for priorities
 def get_priority_counts():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT priority, COUNT(*) as count FROM complaints GROUP BY priority")
-    rows = cursor.fetchall()
-    conn.close()
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT priority, SUM(count) as count
+            FROM complaint_rollup_hourly
+            GROUP BY priority
+            HAVING SUM(count) > 0
+        """)
+        rows = cursor.fetchall()
     return rows
 
 # Get trend of high priority complaints over time
 def get_high_priority_trend():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT DATE(classified_at) as day, COUNT(*) as count
-        FROM complaints
-        WHERE priority = 'High'
-        GROUP BY day
-        ORDER BY day ASC
-    """)
-    rows = cursor.fetchall()
-    conn.close()
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT substr(bucket, 1, 10) as day, SUM(count) as count
+            FROM complaint_rollup_hourly
+            WHERE priority = 'High'
+            GROUP BY day
+            HAVING SUM(count) > 0
+            ORDER BY day ASC
+        """)
+        rows = cursor.fetchall()
     return rows
 
 def init_feedback_table():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS feedback (
-            id                  INTEGER PRIMARY KEY AUTOINCREMENT,
-            complaint_id        INTEGER NOT NULL,
-            complaint_text      TEXT NOT NULL,
-            predicted_category  TEXT NOT NULL,
-            predicted_priority  TEXT NOT NULL,
-            correct_category    TEXT NOT NULL,
-            correct_priority    TEXT NOT NULL,
-            is_correct          INTEGER NOT NULL,
-            submitted_at        TEXT NOT NULL
-        )
-    """)
-    conn.commit()
-    conn.close()
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS feedback (
+                id                  INTEGER PRIMARY KEY AUTOINCREMENT,
+                complaint_id        INTEGER NOT NULL,
+                complaint_text      TEXT NOT NULL,
+                predicted_category  TEXT NOT NULL,
+                predicted_priority  TEXT NOT NULL,
+                correct_category    TEXT NOT NULL,
+                correct_priority    TEXT NOT NULL,
+                is_correct          INTEGER NOT NULL,
+                submitted_at        TEXT NOT NULL,
+                model_version       TEXT
+            )
+        """)
+        # Databases created before model versions were tracked
+        cursor.execute("PRAGMA table_info(feedback)")
+        if "model_version" not in {row[1] for row in cursor.fetchall()}:
+            cursor.execute("ALTER TABLE feedback ADD COLUMN model_version TEXT")
+        conn.commit()
+
+# Resume points of bulk imports into complaints, one row per input file,
+# written in the same transaction as each chunk of rows (src/bulk_classify.py)
+def init_bulk_progress():
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS bulk_import_progress (
+                source      TEXT PRIMARY KEY,
+                rows_done   INTEGER NOT NULL,
+                updated_at  TEXT NOT NULL
+            )
+        """)
+        conn.commit()
+
+# Running feedback accuracy, kept current by triggers so nothing has to scan
+# the feedback table:
+#   feedback_totals          lifetime counts per model version ('' = unknown)
+#   feedback_rollup_hourly   counts per hour x predicted category x predicted
+#                            priority x model version, for windowed and
+#                            broken-down accuracy
+# "correct" means both labels were right; category_correct / priority_correct
+# count each head on its own.
+def init_feedback_rollups():
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'feedback_rollup_hourly'")
+        existed = cursor.fetchone() is not None
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS feedback_totals (
+                model_version       TEXT PRIMARY KEY,
+                total               INTEGER NOT NULL,
+                correct             INTEGER NOT NULL
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS feedback_rollup_hourly (
+                bucket              TEXT NOT NULL,     -- 'YYYY-MM-DDTHH', UTC
+                predicted_category  TEXT NOT NULL,
+                predicted_priority  TEXT NOT NULL,
+                model_version       TEXT NOT NULL,
+                total               INTEGER NOT NULL,
+                correct             INTEGER NOT NULL,
+                category_correct    INTEGER NOT NULL,
+                priority_correct    INTEGER NOT NULL,
+                PRIMARY KEY (bucket, predicted_category, predicted_priority, model_version)
+            ) WITHOUT ROWID
+        """)
+        # Count one feedback row (NEW or OLD) into both tables with sign + or -
+        def count(row, sign):
+            return f"""
+                    INSERT INTO feedback_totals (model_version, total, correct)
+                    VALUES (COALESCE({row}.model_version, ''), {sign}1, {sign}{row}.is_correct)
+                    ON CONFLICT (model_version) DO UPDATE SET
+                        total   = total   {sign} 1,
+                        correct = correct {sign} {row}.is_correct;
+
+                    INSERT INTO feedback_rollup_hourly
+                        (bucket, predicted_category, predicted_priority, model_version,
+                         total, correct, category_correct, priority_correct)
+                    VALUES (substr({row}.submitted_at, 1, 13), {row}.predicted_category, {row}.predicted_priority,
+                            COALESCE({row}.model_version, ''), {sign}1, {sign}{row}.is_correct,
+                            {sign}({row}.predicted_category = {row}.correct_category),
+                            {sign}({row}.predicted_priority = {row}.correct_priority))
+                    ON CONFLICT (bucket, predicted_category, predicted_priority, model_version) DO UPDATE SET
+                        total            = total            {sign} 1,
+                        correct          = correct          {sign} {row}.is_correct,
+                        category_correct = category_correct {sign} ({row}.predicted_category = {row}.correct_category),
+                        priority_correct = priority_correct {sign} ({row}.predicted_priority = {row}.correct_priority);
+            """
+
+        for event, body in (("INSERT", count("NEW", "+")), ("DELETE", count("OLD", "-"))):
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_feedback_rollup_{event.lower()}
+                AFTER {event} ON feedback
+                BEGIN{body}END
+            """)
+        # An edited row comes out of its old counts and goes into its new ones
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_feedback_rollup_update
+            AFTER UPDATE OF predicted_category, predicted_priority, correct_category, correct_priority,
+                            is_correct, submitted_at, model_version ON feedback
+            BEGIN{count("OLD", "-")}{count("NEW", "+")}END
+        """)
+        conn.commit()
+
+    if not existed:
+        backfill_feedback_rollups()
+
+# Rebuild both feedback rollup tables from the feedback table in one transaction
+def backfill_feedback_rollups():
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM feedback_totals")
+        cursor.execute("DELETE FROM feedback_rollup_hourly")
+        cursor.execute("""
+            INSERT INTO feedback_totals (model_version, total, correct)
+            SELECT COALESCE(model_version, ''), COUNT(*), SUM(is_correct)
+            FROM feedback
+            GROUP BY 1
+        """)
+        cursor.execute("""
+            INSERT INTO feedback_rollup_hourly
+                (bucket, predicted_category, predicted_priority, model_version,
+                 total, correct, category_correct, priority_correct)
+            SELECT substr(submitted_at, 1, 13), predicted_category, predicted_priority,
+                   COALESCE(model_version, ''), COUNT(*), SUM(is_correct),
+                   SUM(predicted_category = correct_category), SUM(predicted_priority = correct_priority)
+            FROM feedback
+            GROUP BY 1, 2, 3, 4
+        """)
+        conn.commit()
+        cursor.execute("SELECT COUNT(*) FROM feedback_rollup_hourly")
+        buckets = cursor.fetchone()[0]
+    return buckets
 
 
 def save_feedback(complaint_id, complaint_text, predicted_category,
-                  predicted_priority, correct_category, correct_priority):
+                  predicted_priority, correct_category, correct_priority, model_version=None):
     is_correct = int(
         predicted_category == correct_category and
         predicted_priority == correct_priority
     )
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO feedback (
+    with _timed_write("save_feedback"), connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO feedback (
+                complaint_id, complaint_text, predicted_category, predicted_priority,
+                correct_category, correct_priority, is_correct, submitted_at, model_version
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
             complaint_id, complaint_text, predicted_category, predicted_priority,
-            correct_category, correct_priority, is_correct, submitted_at
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
-        complaint_id, complaint_text, predicted_category, predicted_priority,
-        correct_category, correct_priority, is_correct,
-        datetime.utcnow().isoformat()
-    ))
-    conn.commit()
-    conn.close()
+            correct_category, correct_priority, is_correct,
+            datetime.utcnow().isoformat(), model_version
+        ))
+        conn.commit()
 
 
 def get_all_feedback():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM feedback ORDER BY id DESC")
-    rows = cursor.fetchall()
-    conn.close()
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM feedback ORDER BY id DESC")
+        rows = cursor.fetchall()
     return rows
 
 
+# Feedback rows newer than last_id, oldest first — for incremental retraining
+def get_feedback_since(last_id):
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM feedback WHERE id > ? ORDER BY id ASC", (last_id,))
+        rows = cursor.fetchall()
+    return rows
+
+
+def _accuracy(total, correct):
+    total, correct = total or 0, correct or 0
+    return {"total": total, "correct": correct, "accuracy": round(correct / total, 3) if total > 0 else 0}
+
+# Lifetime accuracy from the running totals — a few rows, whatever the history size
 def get_feedback_accuracy():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT
-            COUNT(*) as total,
-            SUM(is_correct) as correct
-        FROM feedback
-    """)
-    row = cursor.fetchone()
-    conn.close()
-    total = row[0] or 0
-    correct = row[1] or 0
-    accuracy = round(correct / total, 3) if total > 0 else 0
-    return {"total": total, "correct": correct, "accuracy": accuracy}
-
-# Initialize table on import
-init_db()
-init_feedback_table()
\ No newline at end of file
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT SUM(total), SUM(correct) FROM feedback_totals")
+        row = cursor.fetchone()
+    return _accuracy(*row)
+
+# Accuracy over the last n feedback rows — a primary-key range, not a table
+# scan. The range starts at the n-th newest id, so gaps left by deleted rows
+# do not shrink it; with fewer than n rows it covers them all.
+def get_recent_feedback_accuracy(n):
+    if n <= 0:
+        return _accuracy(0, 0)
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT COUNT(*), SUM(is_correct) FROM feedback
+            WHERE id >= COALESCE((SELECT id FROM feedback ORDER BY id DESC LIMIT 1 OFFSET ? - 1), 0)
+        """, (n,))
+        row = cursor.fetchone()
+    return _accuracy(*row)
+
+FEEDBACK_GROUPS = {"category": "predicted_category", "priority": "predicted_priority", "model_version": "model_version"}
+
+# Accuracy over feedback from the last `hours` hours (whole-hour buckets), read
+# from the hourly rollup. With group_by ("category", "priority" or
+# "model_version") returns {group value: accuracy} instead.
+def get_feedback_accuracy_since(hours, group_by=None):
+    cutoff = (datetime.utcnow() - timedelta(hours=hours)).isoformat()[:13]
+    column = FEEDBACK_GROUPS[group_by] if group_by else "''"
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT {column}, SUM(total), SUM(correct), SUM(category_correct), SUM(priority_correct)
+            FROM feedback_rollup_hourly
+            WHERE bucket >= ?
+            GROUP BY 1
+            HAVING SUM(total) > 0
+            ORDER BY 1
+        """, (cutoff,))
+        rows = cursor.fetchall()
+
+    results = {}
+    for key, total, correct, category_correct, priority_correct in rows:
+        results[key] = {
+            **_accuracy(total, correct),
+            "category_accuracy": round(category_correct / total, 3),
+            "priority_accuracy": round(priority_correct / total, 3),
+        }
+    if group_by:
+        return results
+    return results.get("", {**_accuracy(0, 0), "category_accuracy": 0, "priority_accuracy": 0})
+
+# Create or upgrade every table, index and trigger. Idempotent, but not run on
+# import — run it once per deploy (python database/db.py migrate). The API runs
+# it when started directly.
+def migrate():
+    init_db()
+    init_rollups()
+    init_change_counter()
+    init_search()
+    init_feedback_table()
+    init_feedback_rollups()
+    init_bulk_progress()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Complaint database maintenance.")
+    parser.add_argument("command", choices=["migrate", "backfill-rollups", "rebuild-search"])
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        migrate()
+        print(f"Database schema up to date: {DB_PATH}")
+    elif args.command == "backfill-rollups":
+        print(f"Rebuilt rollups: {backfill_rollups()} hourly buckets.")
+        print(f"Rebuilt feedback rollups: {backfill_feedback_rollups()} hourly buckets.")
+    elif args.command == "rebuild-search":
+        print(f"Rebuilt search index: {rebuild_search_index()} complaints.")
@@ -0,0 +1,244 @@
+import os
+import time
+import queue
+import atexit
+import threading
+from datetime import datetime
+
+from db import insert_complaint_rows
+
+FLUSH_ROWS        = 500     #Flush as soon as this many rows are waiting
+FLUSH_INTERVAL_MS = 50      #...or when the oldest waiting row is this old
+MAX_QUEUE         = 10_000  #Rows held in memory before backpressure applies
+BLOCK_TIMEOUT     = 1.0     #Seconds the "block" policy waits for space
+RETRY_BACKOFF     = 0.1     #Seconds before retrying a failed flush, doubling per failure...
+MAX_BACKOFF       = 5.0     #...up to this
+STOP_POLL         = 0.1     #Longest the writer thread waits before checking for stop()
+
+# What submit() does when the queue is full:
+#   block — wait up to BLOCK_TIMEOUT for space, then write the row synchronously
+#   sync  — write the row synchronously straight away
+#   drop  — discard the row and count it
+POLICIES = {"block", "sync", "drop"}
+
+
+class WriteBehindWriter:
+    """
+    Queues complaint rows in memory and writes them from a background thread.
+
+    Rows are stamped with classified_at when queued and flushed with one
+    executemany transaction per batch, so a burst of requests costs one commit
+    instead of one per row. A batch that fails to write is held and retried
+    with backoff ahead of newer rows; nothing is discarded except by the
+    "drop" policy. Call stop() (registered with atexit by start()) to flush
+    what is left on shutdown; rows that still cannot be written then raise.
+    While the writer is not running, submit() writes synchronously.
+    """
+
+    def __init__(self, flush_rows=FLUSH_ROWS, flush_interval_ms=FLUSH_INTERVAL_MS,
+                 max_queue=MAX_QUEUE, policy="block"):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown backpressure policy '{policy}'. Choose from {POLICIES}")
+
+        self.flush_rows     = flush_rows
+        self.flush_interval = flush_interval_ms / 1000
+        self.policy         = policy
+
+        self._queue     = queue.Queue(maxsize=max_queue)
+        self._stop      = threading.Event()
+        self._thread    = None
+        self._lock      = threading.Lock()
+        self._accepting = False
+        self._retry     = []        # rows of failed flushes, written before anything newer
+        self._failures  = 0         # consecutive failed flushes, for the backoff
+
+        self._enqueued       = 0
+        self._written        = 0
+        self._dropped        = 0
+        self._sync_writes    = 0
+        self._failed_flushes = 0
+        self._flushes        = 0
+        self._flush_seconds  = 0.0
+        self._max_flush      = 0.0
+        self._last_flush     = 0.0
+
+    def start(self):
+        self._accepting = True
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+        os.register_at_fork(after_in_child=self._restart_in_child)
+        return self
+
+    # A forked worker inherits this object but not its thread, and the
+    # queue's locks may have been held mid-operation — start clean
+    def _restart_in_child(self):
+        if self._thread is None:
+            return
+        self._queue    = queue.Queue(maxsize=self._queue.maxsize)
+        self._stop     = threading.Event()
+        self._lock     = threading.Lock()
+        self._retry    = []     # the parent still holds (and writes) these
+        self._failures = 0
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    # Queue one prediction. Returns False only if the row was dropped.
+    def submit(self, complaint_text, category, priority, rule_override) -> bool:
+        row = (complaint_text, category, priority, rule_override, datetime.utcnow().isoformat())
+
+        if not self._accepting:
+            self._write_sync([row])
+            return True
+        try:
+            if self.policy == "block":
+                self._queue.put(row, timeout=BLOCK_TIMEOUT)
+            else:
+                self._queue.put_nowait(row)
+        except queue.Full:
+            if self.policy == "drop":
+                with self._lock:
+                    self._dropped += 1
+                return False
+            self._write_sync([row])
+            return True
+
+        with self._lock:
+            self._enqueued += 1
+        # stop() may have drained the queue between the check above and the
+        # put — if so, nobody else will write this row
+        if not self._accepting:
+            self._drain()
+        return True
+
+    def _write_sync(self, rows):
+        insert_complaint_rows(rows)
+        with self._lock:
+            self._sync_writes += len(rows)
+
+    # Block until every row queued so far has been written. While flushes keep
+    # failing this keeps waiting — the rows are held, not lost.
+    def flush(self):
+        self._queue.join()
+        while self._retry and self._thread is not None:
+            time.sleep(self.flush_interval)
+
+    # Stop the background thread, then write whatever it left behind (rows
+    # held after a failed flush, rows queued during shutdown) on the calling
+    # thread. Raises if those rows cannot be written.
+    def stop(self, timeout=10):
+        if self._thread is None:
+            return
+        self._accepting = False
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+        self._drain()
+
+    # Synchronously write the held and queued rows, if any
+    def _drain(self):
+        with self._lock:
+            rows, self._retry = self._retry, []
+        queued = 0
+        while True:
+            try:
+                rows.append(self._queue.get_nowait())
+                queued += 1
+            except queue.Empty:
+                break
+        try:
+            if rows:
+                insert_complaint_rows(rows)
+                with self._lock:
+                    self._written += len(rows)
+        finally:
+            for _ in range(queued):
+                self._queue.task_done()
+
+    # queue.get, waiting in slices so a stop() ends the wait early
+    def _get(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                return self._queue.get(timeout=max(0, min(remaining, STOP_POLL)))
+            except queue.Empty:
+                if remaining <= STOP_POLL or self._stop.is_set():
+                    raise
+
+    def _next_batch(self):
+        try:
+            batch = [self._get(self.flush_interval)]
+        except queue.Empty:
+            return []
+
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.flush_rows:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._get(remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty() and not self._retry):
+            if self._retry:
+                with self._lock:
+                    batch, self._retry = self._retry, []
+                queued = 0
+            else:
+                batch = self._next_batch()
+                queued = len(batch)
+            if batch and not self._write(batch, queued) and self._stop.is_set():
+                return      # shutting down: stop() writes the held rows or raises
+
+    # Write one batch; on failure hold it for a retry after a backoff.
+    # queued is how many of its rows came from the queue (and still need task_done).
+    def _write(self, batch, queued) -> bool:
+        start = time.perf_counter()
+        try:
+            insert_complaint_rows(batch)
+            ok = True
+        except Exception as e:
+            print(f"Write-behind flush of {len(batch)} rows failed, will retry: {e}")
+            ok = False
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            if ok:
+                self._flushes       += 1
+                self._written       += len(batch)
+                self._flush_seconds += elapsed
+                self._last_flush     = elapsed
+                self._max_flush      = max(self._max_flush, elapsed)
+                self._failures       = 0
+            else:
+                self._failed_flushes += 1
+                self._failures       += 1
+                self._retry           = batch + self._retry
+        for _ in range(queued):
+            self._queue.task_done()
+
+        if not ok:
+            self._stop.wait(min(RETRY_BACKOFF * 2 ** (self._failures - 1), MAX_BACKOFF))
+        return ok
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queue_depth"      : self._queue.qsize(),
+                "retry_rows"       : len(self._retry),
+                "enqueued"         : self._enqueued,
+                "written"          : self._written,
+                "dropped"          : self._dropped,
+                "sync_writes"      : self._sync_writes,
+                "failed_flushes"   : self._failed_flushes,
+                "flushes"          : self._flushes,
+                "last_flush_ms"    : round(self._last_flush * 1000, 3),
+                "avg_flush_ms"     : round(self._flush_seconds / self._flushes * 1000, 3) if self._flushes else 0.0,
+                "max_flush_ms"     : round(self._max_flush * 1000, 3),
+            }
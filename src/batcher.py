@@ -0,0 +1,122 @@
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+
+MAX_BATCH = 64      #Requests per batched call
+MAX_WAIT  = 0.005   #Seconds the first request of a batch waits for company
+
+BATCH_SIZE = metrics.histogram("microbatch_size", "Requests coalesced into one batched call",
+                               buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256))
+QUEUE_WAIT = metrics.histogram("microbatch_queue_wait_seconds",
+                               "Time from a request being queued to its batch starting")
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-item calls into one batched call.
+
+    submit() queues an item and awaits its result. One consumer task takes the
+    oldest waiting item and keeps collecting until max_batch items are queued or
+    max_wait seconds have passed since that item arrived, then runs func(items)
+    in a worker thread and hands each caller its result. Batches run one at a
+    time, so requests that arrive during a batch form the next one: under load
+    batches grow on their own, and no request waits longer than max_wait plus
+    the batch ahead of it.
+
+    stop() lets a batch already running finish and answers its callers; every
+    request still being collected or queued gets a RuntimeError.
+    """
+
+    def __init__(self, func, max_batch=MAX_BATCH, max_wait=MAX_WAIT):
+        self.func      = func
+        self.max_batch = max_batch
+        self.max_wait  = max_wait
+
+        self._queue    = None
+        self._task     = None
+        self._batch    = []     # (item, future, queued_at) being collected or run
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="microbatch")
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task  = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        pending = [future for _, future, _ in self._batch]
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait()[1])
+        for future in pending:
+            if not future.done():
+                future.set_exception(RuntimeError("Batcher stopped."))
+        self._batch = []
+        self._task  = None
+
+    async def submit(self, item):
+        if self._task is None:
+            self.start()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self):
+        self._batch = batch = [await self._queue.get()]
+        deadline = batch[0][2] + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())      # past the window: take only what is already queued
+                else:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+
+            started = time.perf_counter()
+            BATCH_SIZE.observe(len(batch))
+            for _, _, queued_at in batch:
+                QUEUE_WAIT.observe(started - queued_at)
+
+            # Callers that gave up (client disconnected) are left out of the call
+            live = [(item, future) for item, future, _ in batch if not future.done()]
+            if not live:
+                continue
+            call = loop.run_in_executor(self._executor, self.func, [item for item, _ in live])
+            try:
+                await self._finish(call, live)
+            except asyncio.CancelledError:
+                # stop() mid-batch: the worker thread cannot be interrupted, so
+                # wait for it and answer this batch's callers before exiting
+                await self._finish(call, live)
+                raise
+            finally:
+                self._batch = []
+
+    # Hand each caller its result, or the batch's exception. shield() keeps a
+    # cancelled task from cancelling the call itself, so it can be awaited again.
+    async def _finish(self, call, live):
+        try:
+            results = await asyncio.shield(call)
+        except Exception as e:
+            for _, future in live:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(live, results):
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,204 @@
+import os
+import sys
+import json
+import time
+import platform
+import tempfile
+import argparse
+import subprocess
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+DATA_PATH     = os.path.join(os.path.dirname(__file__), "../data/complaints_final.csv")
+LIMIT         = 2000                #Complaints replayed per stage
+BATCH_SIZES   = [1, 8, 32, 128]
+THREAD_COUNTS = [1, 2, 4]
+ENDPOINT_ROWS = 500                 #The Flask stage also writes a row per request, so keep it shorter
+
+# Measure the pipeline itself: no prediction cache, and writes go to a scratch
+# database unless COMPLAINTS_DB is set. Both are read at import, so set them first.
+os.environ["PREDICTION_CACHE_SIZE"] = "0"
+_scratch = None
+if "COMPLAINTS_DB" not in os.environ:
+    _scratch = tempfile.TemporaryDirectory()
+    os.environ["COMPLAINTS_DB"] = os.path.join(_scratch.name, "benchmark.db")
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../database"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../api"))
+
+from preprocessor import clean_text
+from rules import apply_priority_rules
+from sentiment import analyze
+from compact import CompactScorer
+from predict import classify, classify_many, get_active, warm_up
+from db import migrate, save_complaint
+
+
+def summarize(latencies, items=None) -> dict:
+    lat   = np.asarray(latencies) * 1000
+    total = float(lat.sum()) / 1000
+    items = len(lat) if items is None else items
+    return {
+        "calls"         : len(lat),
+        "items"         : items,
+        "total_s"       : round(total, 4),
+        "items_per_s"   : round(items / total, 1) if total else 0.0,
+        "mean_ms"       : round(float(lat.mean()), 4),
+        "p50_ms"        : round(float(np.percentile(lat, 50)), 4),
+        "p95_ms"        : round(float(np.percentile(lat, 95)), 4),
+        "p99_ms"        : round(float(np.percentile(lat, 99)), 4),
+    }
+
+
+# Latency of each call of func over items, one item at a time
+def time_each(func, items) -> list[float]:
+    latencies = []
+    for item in items:
+        start = time.perf_counter()
+        func(item)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def stage_functions(model):
+    if isinstance(model, CompactScorer):
+        return model.transform, lambda features, head: model.predict_proba(features, head)
+    return model["vectorizer"].transform, lambda features, head: model[head].predict_proba(features)
+
+
+# Each pipeline stage on its own, one complaint per call
+def bench_stages(texts) -> dict:
+    _, model = get_active()
+    vectorize, predict_head = stage_functions(model)
+
+    cleans   = [clean_text(t) for t in texts]
+    features = [vectorize([c]) for c in cleans]
+
+    from app import app
+    client = app.test_client()
+
+    def post(text):
+        response = client.post("/classify-complaint", json={"text": text})
+        assert response.status_code == 200, response.get_json()
+
+    return {
+        "clean_text"       : summarize(time_each(clean_text, texts)),
+        "vectorize"        : summarize(time_each(lambda c: vectorize([c]), cleans)),
+        "category_model"   : summarize(time_each(lambda f: predict_head(f, "category"), features)),
+        "priority_model"   : summarize(time_each(lambda f: predict_head(f, "priority"), features)),
+        "priority_rules"   : summarize(time_each(lambda t: apply_priority_rules(t, "Low"), texts)),
+        "sentiment"        : summarize(time_each(analyze, texts)),
+        "db_insert"        : summarize(time_each(lambda t: save_complaint(t, "Billing", "Low", False), texts)),
+        "classify"         : summarize(time_each(classify, texts)),
+        "endpoint"         : summarize(time_each(post, texts[:ENDPOINT_ROWS])),
+    }
+
+
+# classify_many at each batch size — latency is per batch, throughput per complaint
+def bench_batch_sizes(texts, batch_sizes) -> dict:
+    results = {}
+    for size in batch_sizes:
+        batches = [texts[i:i + size] for i in range(0, len(texts), size)]
+        results[str(size)] = summarize(time_each(classify_many, batches), items=len(texts))
+    return results
+
+
+# classify from a thread pool — latency is per complaint, throughput is wall clock
+def bench_threads(texts, thread_counts) -> dict:
+    results = {}
+    for threads in thread_counts:
+        def timed(text):
+            start = time.perf_counter()
+            classify(text)
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            latencies = list(pool.map(timed, texts))
+        wall = time.perf_counter() - start
+
+        summary = summarize(latencies)
+        summary["wall_s"]      = round(wall, 4)
+        summary["items_per_s"] = round(len(texts) / wall, 1)
+        results[str(threads)] = summary
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, cwd=os.path.dirname(__file__)).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run_benchmark(limit=LIMIT, batch_sizes=BATCH_SIZES, thread_counts=THREAD_COUNTS) -> dict:
+    migrate()
+    warm_up()
+
+    df    = pd.read_csv(DATA_PATH)
+    texts = df["complaint_text"].astype(str).str.strip().tolist()[:limit]
+
+    # One untimed pass so the lemma cache and sklearn code paths are warm
+    classify_many(texts[:100])
+
+    return {
+        "meta": {
+            "commit"       : _git_commit(),
+            "timestamp"    : datetime.utcnow().isoformat(),
+            "python"       : platform.python_version(),
+            "cpu_count"    : os.cpu_count(),
+            "model_version": get_active()[0],
+            "complaints"   : len(texts),
+        },
+        "stages"      : bench_stages(texts),
+        "batch_sizes" : bench_batch_sizes(texts, batch_sizes),
+        "threads"     : bench_threads(texts, thread_counts),
+    }
+
+
+def print_report(report, baseline=None):
+    def rows(section):
+        for name, s in report[section].items():
+            line = (f"{section + ':' + name:<28} {s['items_per_s']:>10.1f}/s "
+                    f"p50 {s['p50_ms']:>9.3f} ms  p95 {s['p95_ms']:>9.3f} ms  p99 {s['p99_ms']:>9.3f} ms")
+            old = (baseline or {}).get(section, {}).get(name)
+            if old and old["p50_ms"]:
+                line += f"   p50 {(s['p50_ms'] / old['p50_ms'] - 1) * 100:+6.1f}% vs baseline"
+            print(line)
+
+    print(f"Commit {report['meta']['commit']}  model {report['meta']['model_version']}  "
+          f"{report['meta']['complaints']} complaints")
+    for section in ("stages", "batch_sizes", "threads"):
+        rows(section)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-stage latency and throughput of the inference pipeline.")
+    parser.add_argument("--limit", type=int, default=LIMIT, help="Complaints replayed from the dataset")
+    parser.add_argument("--batch-sizes", default=",".join(map(str, BATCH_SIZES)))
+    parser.add_argument("--threads", default=",".join(map(str, THREAD_COUNTS)))
+    parser.add_argument("--out", help="Write the report as JSON to this file")
+    parser.add_argument("--compare", help="Earlier JSON report to show p50 changes against")
+    args = parser.parse_args()
+
+    report = run_benchmark(
+        limit         = args.limit,
+        batch_sizes   = [int(x) for x in args.batch_sizes.split(",")],
+        thread_counts = [int(x) for x in args.threads.split(",")],
+    )
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written -> {args.out}")
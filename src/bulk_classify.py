@@ -0,0 +1,271 @@
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import itertools
+from collections import namedtuple
+from functools import partial
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../database"))
+
+from parallel import imap_chunks
+from predict import classify_many, warm_up
+from db import clear_bulk_progress, get_bulk_progress, insert_complaint_rows, migrate
+
+CHUNK_SIZE = 1000   #Complaints per chunk — each chunk is one classify_many call and one DB transaction
+
+# Columns added to every output record
+PREDICTION_FIELDS = [
+    "category", "category_confidence", "priority", "priority_confidence",
+    "rule_override", "rule_explanation", "sentiment_label", "sentiment_score",
+    "sentiment_boosted", "model_version", "classified_at", "error",
+]
+
+csv.field_size_limit(sys.maxsize)
+
+
+# Input columns that share a name with a prediction field (e.g. labelled
+# "category") are kept as input_<name> rather than overwritten
+def output_field(name):
+    return f"input_{name}" if name in PREDICTION_FIELDS else name
+
+
+def file_format(path, fmt=None):
+    fmt = fmt or os.path.splitext(path)[1].lstrip(".").lower()
+    if fmt not in ("csv", "jsonl"):
+        raise ValueError(f"Cannot tell the format of {path}; pass --format csv or jsonl.")
+    return fmt
+
+
+# Stands in for a JSONL line that is not valid JSON, so one bad line becomes an
+# error row instead of stopping the run (and every --resume after it)
+InvalidLine = namedtuple("InvalidLine", ["error"])
+
+
+# Stream input records one at a time — dicts, except JSONL lines that hold
+# some other JSON value or no valid JSON at all, which classify_chunk reports
+# as bad rows
+def read_records(path, fmt):
+    with open(path, newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except ValueError as e:
+                        yield InvalidLine(f"invalid JSON: {e}")
+
+
+def chunked(records, size):
+    records = iter(records)
+    while True:
+        chunk = list(itertools.islice(records, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# Worker stage: clean -> score -> rules -> sentiment for one chunk (all inside
+# classify_many), returning the input records with prediction fields added.
+# Rows with no text, or that are not objects, are passed through with an error
+# instead of failing the chunk.
+def classify_chunk(records, text_field):
+    texts  = [str(r.get(text_field) or "").strip() if isinstance(r, dict) else "" for r in records]
+    filled = [i for i, t in enumerate(texts) if t]
+    preds  = dict(zip(filled, classify_many([texts[i] for i in filled])))
+
+    classified_at = datetime.utcnow().isoformat()
+    results = []
+    for i, record in enumerate(records):
+        if not isinstance(record, dict):
+            out = {field: None for field in PREDICTION_FIELDS}
+            if isinstance(record, InvalidLine):
+                out["error"] = record.error
+            else:
+                out["error"] = f"record is not an object: {json.dumps(record)[:100]}"
+            results.append(out)
+            continue
+
+        out  = {output_field(k): v for k, v in record.items()}
+        pred = preds.get(i)
+        if pred is None:
+            out.update({field: None for field in PREDICTION_FIELDS})
+            out["error"] = f"missing or empty '{text_field}'"
+        else:
+            out.update({
+                "category"           : pred.category,
+                "category_confidence": pred.category_confidence,
+                "priority"           : pred.priority,
+                "priority_confidence": pred.priority_confidence,
+                "rule_override"      : pred.rule_override,
+                "rule_explanation"   : pred.rule_explanation,
+                "sentiment_label"    : pred.sentiment_label,
+                "sentiment_score"    : pred.sentiment_score,
+                "sentiment_boosted"  : pred.sentiment_boosted,
+                "model_version"      : pred.model_version,
+                "classified_at"      : classified_at,
+                "error"              : None,
+            })
+        results.append(out)
+    return results
+
+
+class ResultWriter:
+    """
+    Appends classified records to a CSV or JSONL file.
+
+    offset() is the file size after everything written so far is on disk; the
+    checkpoint stores it so a resumed run can cut off a partly written chunk.
+    """
+
+    def __init__(self, path, fmt, input_fields, resume_offset=None):
+        self.path = path
+        self.fmt  = fmt
+        if resume_offset is None:
+            self._file = open(path, "w", newline="", encoding="utf-8")
+        else:
+            with open(path, "r+b") as f:
+                f.truncate(resume_offset)
+            self._file = open(path, "a", newline="", encoding="utf-8")
+
+        self._csv = None
+        if fmt == "csv":
+            fields = [output_field(f) for f in input_fields] + PREDICTION_FIELDS
+            self._csv = csv.DictWriter(self._file, fieldnames=fields, extrasaction="ignore")
+            if resume_offset is None:
+                self._csv.writeheader()
+
+    def write(self, results):
+        if self._csv is not None:
+            self._csv.writerows(results)
+        else:
+            self._file.writelines(json.dumps(r, ensure_ascii=False) + "\n" for r in results)
+
+    def offset(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return os.path.getsize(self.path)
+
+    def close(self):
+        self._file.close()
+
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+# Written atomically after each chunk's output and DB rows are committed. The
+# database keeps its own resume point (db.get_bulk_progress), committed with
+# the rows, so a crash between the two never inserts a chunk twice.
+def save_checkpoint(path, state):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def run(input_path, output_path=None, to_db=False, text_field="complaint_text",
+        timestamp_field=None, input_format=None, output_format=None,
+        chunk_size=CHUNK_SIZE, workers=1, checkpoint_path=None, resume=False):
+    if output_path is None and not to_db:
+        raise ValueError("Nothing to do: give an output file, --db, or both.")
+
+    in_fmt  = file_format(input_path, input_format)
+    out_fmt = file_format(output_path, output_format) if output_path else None
+    checkpoint_path = checkpoint_path or (output_path or input_path) + ".checkpoint.json"
+
+    state = load_checkpoint(checkpoint_path) if resume else None
+    if state is not None and state["input"] != os.path.abspath(input_path):
+        raise ValueError(f"Checkpoint {checkpoint_path} belongs to {state['input']}, not {input_path}.")
+    if state is None:
+        state = {"input": os.path.abspath(input_path), "rows_done": 0, "output_bytes": None}
+    elif state["rows_done"]:
+        print(f"Resuming after row {state['rows_done']}")
+
+    # Rows before db_done are already in the database; only the output is redone
+    db_done = 0
+    if to_db:
+        migrate()
+        if resume:
+            db_done = get_bulk_progress(state["input"])
+
+    records = read_records(input_path, in_fmt)
+    first   = next(records, None)
+    if first is None:
+        print("Input is empty.")
+        return 0
+    records = itertools.islice(itertools.chain([first], records), state["rows_done"], None)
+
+    writer = None
+    if output_path:
+        fields = list(first.keys()) if isinstance(first, dict) else []
+        writer = ResultWriter(output_path, out_fmt, fields,
+                              resume_offset=state["output_bytes"] if state["rows_done"] else None)
+
+    start, done = time.perf_counter(), 0
+    try:
+        work = partial(classify_chunk, text_field=text_field)
+        for results in imap_chunks(work, chunked(records, chunk_size), workers=workers, initializer=warm_up):
+            if writer is not None:
+                writer.write(results)
+                state["output_bytes"] = writer.offset()
+            if to_db:
+                first_row = state["rows_done"]
+                insert_complaint_rows([
+                    (r[text_field], r["category"], r["priority"], r["rule_override"],
+                     (timestamp_field and r.get(output_field(timestamp_field))) or r["classified_at"])
+                    for row, r in enumerate(results, first_row) if r["error"] is None and row >= db_done
+                ], progress=(state["input"], max(db_done, first_row + len(results))))
+
+            done += len(results)
+            state["rows_done"] += len(results)
+            save_checkpoint(checkpoint_path, state)
+
+            elapsed = time.perf_counter() - start
+            print(f"{state['rows_done']:>10} rows  {done / elapsed:>8.0f} rows/s", file=sys.stderr)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    os.remove(checkpoint_path)
+    if to_db:
+        clear_bulk_progress(state["input"])
+    print(f"Classified {done} rows in {time.perf_counter() - start:.1f}s")
+    return done
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Classify a CSV or JSONL file of complaints in streaming chunks.")
+    parser.add_argument("input", help="CSV or JSONL file of complaints")
+    parser.add_argument("-o", "--output", help="Write classified records here (.csv or .jsonl)")
+    parser.add_argument("--db", action="store_true", help="Bulk-insert predictions into the complaints table")
+    parser.add_argument("--text-field", default="complaint_text")
+    parser.add_argument("--timestamp-field", help="Use this field as classified_at in the database (historical backfills)")
+    parser.add_argument("--format", dest="input_format", choices=["csv", "jsonl"], help="Input format (default: from extension)")
+    parser.add_argument("--output-format", choices=["csv", "jsonl"], help="Output format (default: from extension)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=1, help="Classifier processes (default: 1)")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <output or input>.checkpoint.json)")
+    parser.add_argument("--resume", action="store_true", help="Continue from the checkpoint of an interrupted run")
+    args = parser.parse_args()
+
+    run(
+        args.input, args.output, to_db=args.db,
+        text_field      = args.text_field,
+        timestamp_field = args.timestamp_field,
+        input_format    = args.input_format,
+        output_format   = args.output_format,
+        chunk_size      = args.chunk_size,
+        workers         = args.workers,
+        checkpoint_path = args.checkpoint,
+        resume          = args.resume,
+    )
@@ -0,0 +1,195 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+CACHE_SIZE    = 10_000      #Predictions held in memory per process
+SHARED_ROWS   = 200_000     #Rows kept in the shared SQLite tier
+PRUNE_EVERY   = 1_000       #Shared-tier writes between prunes
+LOOKUP_CHUNK  = 500         #Keys per SELECT ... IN (...), under SQLite's variable limit
+
+
+# Cache key for one complaint. Only leading/trailing whitespace is normalized:
+# the rules and VADER read the raw text (case, punctuation, spacing inside the
+# text all change their output), so anything more aggressive would let two
+# texts with different predictions share an entry. The model and rule-set
+# versions are part of the key, so promoting a model or editing the rules
+# invalidates every old entry without an explicit flush.
+def make_key(text: str, model_version: str, rules_version: str) -> str:
+    payload = "\0".join((model_version, rules_version, text.strip()))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class PredictionCache:
+    """
+    In-process LRU of predictions with an optional TTL.
+
+    Bounded by entry count; the least recently used entry is evicted first.
+    Entries older than ttl seconds count as misses and are dropped on read.
+    """
+
+    def __init__(self, maxsize=CACHE_SIZE, ttl=None):
+        self.maxsize = maxsize
+        self.ttl     = ttl
+
+        self._entries = OrderedDict()    # key -> (stored_at, value)
+        self._lock    = threading.Lock()
+
+        self._hits        = 0
+        self._misses      = 0
+        self._evictions   = 0
+        self._expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            stored_at, value = entry
+            if self.ttl and time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size"       : len(self._entries),
+                "maxsize"    : self.maxsize,
+                "ttl"        : self.ttl,
+                "hits"       : self._hits,
+                "misses"     : self._misses,
+                "evictions"  : self._evictions,
+                "expirations": self._expirations,
+                "hit_rate"   : round(self._hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class SharedCacheTier:
+    """
+    Prediction cache in a SQLite file, shared by every worker process on the host.
+
+    Values are stored as JSON. Consulted after the in-process LRU misses, so a
+    complaint classified by one worker is a hit for the others. Each process
+    opens its own connection (checked by pid, so forked workers reconnect).
+    """
+
+    def __init__(self, path, ttl=None, max_rows=SHARED_ROWS):
+        self.path     = path
+        self.ttl      = ttl
+        self.max_rows = max_rows
+
+        self._conn  = None
+        self._pid   = None
+        self._lock  = threading.Lock()
+        self._puts  = 0
+
+        self._hits   = 0
+        self._misses = 0
+        self._pruned = 0
+
+    def _connection(self):
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS prediction_cache (
+                    key       TEXT PRIMARY KEY,
+                    value     TEXT NOT NULL,
+                    stored_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_prediction_cache_stored_at ON prediction_cache (stored_at)")
+            conn.commit()
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    # key -> decoded value for the keys present and not expired
+    def get_many(self, keys) -> dict:
+        if not keys:
+            return {}
+        keys = list(keys)
+        with self._lock:
+            conn = self._connection()
+            rows = []
+            for i in range(0, len(keys), LOOKUP_CHUNK):
+                chunk = keys[i:i + LOOKUP_CHUNK]
+                rows += conn.execute(
+                    f"SELECT key, value, stored_at FROM prediction_cache WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+
+            now = time.time()
+            found = {
+                key: json.loads(value)
+                for key, value, stored_at in rows
+                if not self.ttl or now - stored_at <= self.ttl
+            }
+            self._hits   += len(found)
+            self._misses += len(keys) - len(found)
+            return found
+
+    def put_many(self, items):
+        if not items:
+            return
+        with self._lock:
+            conn = self._connection()
+            now  = time.time()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO prediction_cache (key, value, stored_at) VALUES (?, ?, ?)",
+                    [(key, json.dumps(value), now) for key, value in items],
+                )
+            self._puts += len(items)
+            if self._puts >= PRUNE_EVERY:
+                self._puts = 0
+                self._prune(conn)
+
+    # Drop expired rows, then the oldest rows beyond max_rows
+    def _prune(self, conn):
+        with conn:
+            removed = 0
+            if self.ttl:
+                removed += conn.execute(
+                    "DELETE FROM prediction_cache WHERE stored_at < ?", (time.time() - self.ttl,)
+                ).rowcount
+            removed += conn.execute("""
+                DELETE FROM prediction_cache WHERE key IN (
+                    SELECT key FROM prediction_cache ORDER BY stored_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_rows,)).rowcount
+        self._pruned += removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "path"    : self.path,
+                "ttl"     : self.ttl,
+                "hits"    : self._hits,
+                "misses"  : self._misses,
+                "pruned"  : self._pruned,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,179 @@
+import os
+import re
+import sys
+import json
+import argparse
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+MODELS_DIR     = os.path.join(os.path.dirname(__file__), "../models")
+COMPACT_DIR    = os.path.join(MODELS_DIR, "compact")
+FORMAT_VERSION = 1
+HEADS          = ("category", "priority")
+
+# Compact model layout — one directory, every array a plain .npy file so it
+# can be memory-mapped and shared through the page cache by many workers:
+#   manifest.json            format version, TF-IDF settings, class labels
+#   terms.npy                sorted vocabulary (fixed-width unicode)
+#   idf.npy                  IDF weight per term, in the same order
+#   <head>_coef.npy          (n_classes, n_terms) coefficients
+#   <head>_intercept.npy     (n_classes,) intercepts
+
+
+# Write a fitted batch (TF-IDF + LogisticRegression) joint model to out_dir
+def export_compact(model, out_dir=COMPACT_DIR):
+    if model.get("kind", "batch") != "batch":
+        raise ValueError("Only batch TF-IDF models can be exported; online hashing models have no vocabulary.")
+
+    vectorizer = model["vectorizer"]
+    if vectorizer.analyzer != "word" or vectorizer.stop_words is not None or vectorizer.strip_accents is not None:
+        raise ValueError("Compact export supports word n-grams without stop words or accent stripping.")
+    if vectorizer.tokenizer is not None or vectorizer.preprocessor is not None:
+        raise ValueError("Compact export cannot reproduce a custom tokenizer or preprocessor.")
+    if vectorizer.norm not in ("l1", "l2", None):
+        raise ValueError(f"Compact export supports norm 'l1', 'l2' or None, not {vectorizer.norm!r}.")
+
+    terms = vectorizer.get_feature_names_out().astype(str)
+    order = np.argsort(terms, kind="stable")
+
+    os.makedirs(out_dir, exist_ok=True)
+    np.save(os.path.join(out_dir, "terms.npy"), terms[order])
+    # Without use_idf every term weighs 1; the scorer multiplies by ones
+    idf = vectorizer.idf_ if vectorizer.use_idf else np.ones(len(terms))
+    np.save(os.path.join(out_dir, "idf.npy"), idf[order])
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "n_terms"       : int(len(terms)),
+        "lowercase"     : bool(vectorizer.lowercase),
+        "token_pattern" : vectorizer.token_pattern,
+        "ngram_range"   : list(vectorizer.ngram_range),
+        "binary"        : bool(vectorizer.binary),
+        "sublinear_tf"  : bool(vectorizer.sublinear_tf),
+        "norm"          : vectorizer.norm,
+        "feedback_watermark": model.get("feedback_watermark", 0),
+    }
+    for head in HEADS:
+        clf = model[head]
+        np.save(os.path.join(out_dir, f"{head}_coef.npy"), np.ascontiguousarray(clf.coef_[:, order]))
+        np.save(os.path.join(out_dir, f"{head}_intercept.npy"), clf.intercept_)
+        manifest[f"{head}_classes"] = [str(c) for c in clf.classes_]
+
+    # Manifest last — a directory without one is an incomplete export
+    with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"Exported compact model -> {out_dir}")
+
+
+class CompactScorer:
+    """
+    Scores cleaned text against an exported compact model with NumPy/SciPy only.
+
+    Reproduces TfidfVectorizer.transform followed by LogisticRegression.predict_proba
+    for both heads. Arrays are memory-mapped read-only, so workers that load the
+    same directory share one copy of the weights.
+    """
+
+    def __init__(self, path=COMPACT_DIR):
+        with open(os.path.join(path, "manifest.json")) as f:
+            self.manifest = json.load(f)
+        if self.manifest["format_version"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported compact model format {self.manifest['format_version']} in {path}")
+
+        load = lambda name: np.load(os.path.join(path, name), mmap_mode="r")
+        self.terms = load("terms.npy")
+        self.idf   = load("idf.npy")
+        self.coef      = {head: load(f"{head}_coef.npy") for head in HEADS}
+        self.intercept = {head: load(f"{head}_intercept.npy") for head in HEADS}
+        self.classes   = {head: np.array(self.manifest[f"{head}_classes"]) for head in HEADS}
+
+        self._token_re = re.compile(self.manifest["token_pattern"])
+        self._min_n, self._max_n = self.manifest["ngram_range"]
+
+    def _ngrams(self, text):
+        if self.manifest["lowercase"]:
+            text = text.lower()
+        tokens = self._token_re.findall(text)
+        grams = []
+        for n in range(self._min_n, self._max_n + 1):
+            if n == 1:
+                grams.extend(tokens)
+            else:
+                grams.extend(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return grams
+
+    # TF-IDF matrix for a list of cleaned texts — same values as the fitted vectorizer
+    def transform(self, texts) -> csr_matrix:
+        rows, grams = [], []
+        for i, text in enumerate(texts):
+            g = self._ngrams(text)
+            grams.extend(g)
+            rows.extend([i] * len(g))
+
+        n_terms = len(self.terms)
+        shape   = (len(texts), n_terms)
+        if not grams:
+            return csr_matrix(shape)
+
+        # One vectorized vocabulary lookup for the whole batch
+        grams = np.array(grams)
+        cols  = np.searchsorted(self.terms, grams)
+        cols[cols == n_terms] = 0
+        known = self.terms[cols] == grams
+
+        X = csr_matrix(
+            (np.ones(known.sum()), (np.asarray(rows)[known], cols[known])),
+            shape=shape,
+        )
+        X.sum_duplicates()
+
+        if self.manifest.get("binary", False):
+            X.data[:] = 1
+        elif self.manifest["sublinear_tf"]:
+            np.log(X.data, X.data)
+            X.data += 1
+        X.data *= self.idf[X.indices]
+
+        norm = self.manifest["norm"]
+        if norm is not None:
+            row_of = np.repeat(np.arange(shape[0]), np.diff(X.indptr))
+            values = X.data ** 2 if norm == "l2" else np.abs(X.data)
+            row_norms = np.bincount(row_of, weights=values, minlength=shape[0])
+            if norm == "l2":
+                row_norms = np.sqrt(row_norms)
+            row_norms[row_norms == 0] = 1
+            X.data /= row_norms[row_of]
+        return X
+
+    def predict_proba(self, features, head):
+        scores = features @ self.coef[head].T + self.intercept[head]
+        if scores.shape[1] == 1:
+            p = 1 / (1 + np.exp(-scores[:, 0]))
+            return np.column_stack([1 - p, p])
+        scores = scores - scores.max(axis=1, keepdims=True)
+        np.exp(scores, scores)
+        scores /= scores.sum(axis=1, keepdims=True)
+        return scores
+
+    # (category_classes, category_probs, priority_classes, priority_probs)
+    def score(self, cleans):
+        features = self.transform(cleans)
+        return (
+            self.classes["category"], self.predict_proba(features, "category"),
+            self.classes["priority"], self.predict_proba(features, "priority"),
+        )
+
+
+if __name__ == "__main__":
+    from train import load_saved_model
+
+    parser = argparse.ArgumentParser(description="Export the joint model to the compact memory-mapped format.")
+    parser.add_argument("--model", default="joint_model.pkl", help="Pickled joint model in models/")
+    parser.add_argument("--out", default=COMPACT_DIR, help="Output directory")
+    args = parser.parse_args()
+    # Versions published through src/registry.py already carry their compact export;
+    # this is for the legacy models/joint_model.pkl layout and one-off models
+    export_compact(load_saved_model(args.model), args.out)
@@ -0,0 +1,181 @@
+import os
+import glob
+import pickle
+import hashlib
+
+import numpy as np
+from scipy.sparse import load_npz, save_npz
+
+from preprocessor import PREPROCESSOR_VERSION, clean_parallel
+
+CACHE_DIR       = os.environ.get("FEATURE_CACHE_DIR", os.path.join(os.path.dirname(__file__), "../cache"))
+FEATURE_ENTRIES = 8             #Fitted feature matrices kept; older ones are deleted
+CLEAN_RUNS      = 10            #Runs a cached cleaned row may go unused before it is pruned
+CLEAN_ENTRIES   = 2_000_000     #Most cleaned rows kept; the least recently used go first
+
+# Training-time preprocessing cache, in CACHE_DIR:
+#   clean_text_v<version>.npz          cleaned text for every row seen so far:
+#                                        hashes  sorted 16-byte content hashes of the raw text
+#                                        offsets start of each row in blob (n + 1 entries)
+#                                        blob    UTF-8 cleaned text, concatenated
+#                                        used    run that last looked up or added each row
+#                                        run     number of the run that wrote the file
+#   features_<key>.npz                 TF-IDF matrix of a training set (scipy sparse)
+#   features_<key>.vectorizer.pkl      the vectorizer fitted on it
+# A row is identified by the hash of its text, so edits, inserts and
+# reordering only reprocess the rows that actually changed.
+
+
+def row_hashes(texts) -> np.ndarray:
+    return np.array(
+        [hashlib.blake2b(str(t).encode("utf-8"), digest_size=16).digest() for t in texts],
+        dtype="S16",
+    )
+
+
+def _write_atomic(path, write):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        write(f)
+    os.replace(tmp, path)
+
+
+class CleanTextStore:
+    """
+    Cleaned text keyed by raw-text hash, stored as columns in one .npz.
+
+    add() only buffers new rows; save() merges them into the stored columns
+    and writes the file once. Each load counts as one run: rows looked up or
+    added are stamped with it, and save() drops rows unused for CLEAN_RUNS
+    runs, then the least recently used beyond CLEAN_ENTRIES.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        if os.path.exists(path):
+            with np.load(path) as data:
+                self.hashes, self.offsets, self.blob = data["hashes"], data["offsets"], data["blob"]
+                # Stores written before pruning have no run stamps
+                self.used = data["used"] if "used" in data.files else np.zeros(len(self.hashes), dtype=np.int64)
+                self.run  = int(data["run"]) + 1 if "run" in data.files else 1
+        else:
+            self.hashes  = np.array([], dtype="S16")
+            self.offsets = np.zeros(1, dtype=np.int64)
+            self.blob    = np.array([], dtype=np.uint8)
+            self.used    = np.array([], dtype=np.int64)
+            self.run     = 1
+        self._pending = {}      # hash -> cleaned text, added since the last save
+
+    def __len__(self):
+        return len(self.hashes) + len(self._pending)
+
+    # Positions of hashes in the stored columns, and which of them are stored
+    def _find(self, hashes):
+        if not len(self.hashes):
+            return np.zeros(len(hashes), dtype=np.int64), np.zeros(len(hashes), dtype=bool)
+        pos = np.searchsorted(self.hashes, hashes).clip(max=len(self.hashes) - 1)
+        return pos, self.hashes[pos] == hashes
+
+    # Cleaned text for each hash, or None where it is not cached
+    def lookup(self, hashes) -> list:
+        pos, found = self._find(hashes)
+        self.used[pos[found]] = self.run
+        blob = self.blob.tobytes()
+        return [
+            blob[self.offsets[p]:self.offsets[p + 1]].decode("utf-8") if hit else self._pending.get(h)
+            for h, p, hit in zip(hashes, pos, found)
+        ]
+
+    def add(self, hashes, cleans):
+        _, found = self._find(hashes)
+        for h, c, hit in zip(hashes, cleans, found):
+            if not hit:
+                self._pending[h] = c
+
+    def save(self):
+        keep = np.flatnonzero(self.used > self.run - CLEAN_RUNS)
+        if len(keep) + len(self._pending) > CLEAN_ENTRIES:
+            # New rows are the most recently used; fill what is left with the newest stored ones
+            room = max(CLEAN_ENTRIES - len(self._pending), 0)
+            keep = keep[np.argsort(-self.used[keep], kind="stable")[:room]]
+
+        blob   = self.blob.tobytes()
+        texts  = [blob[self.offsets[i]:self.offsets[i + 1]] for i in keep]
+        texts += [c.encode("utf-8") for c in self._pending.values()]
+        hashes = np.concatenate([self.hashes[keep], np.array(list(self._pending), dtype="S16")])
+        used   = np.concatenate([self.used[keep], np.full(len(self._pending), self.run, dtype=np.int64)])
+
+        order        = np.argsort(hashes, kind="stable")
+        self.hashes  = hashes[order]
+        self.used    = used[order]
+        ordered      = [texts[i] for i in order]
+        self.offsets = np.concatenate([[0], np.cumsum([len(t) for t in ordered])]).astype(np.int64)
+        self.blob    = np.frombuffer(b"".join(ordered), dtype=np.uint8)
+        self._pending = {}
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        _write_atomic(self.path, lambda f: np.savez(f, hashes=self.hashes, offsets=self.offsets, blob=self.blob,
+                                                    used=self.used, run=self.run))
+
+
+# clean_parallel, but only for rows whose text is not already in the cache
+def clean_cached(texts, workers=None, cache_dir=CACHE_DIR) -> list[str]:
+    texts  = list(texts)
+    store  = CleanTextStore(os.path.join(cache_dir, f"clean_text_v{PREPROCESSOR_VERSION}.npz"))
+    hashes = row_hashes(texts)
+    cleans = store.lookup(hashes)
+
+    # Non-strings clean to "" and are not worth caching
+    missing = {}
+    for i, (t, c) in enumerate(zip(texts, cleans)):
+        if c is None and isinstance(t, str):
+            missing.setdefault(hashes[i], t)
+
+    if missing:
+        fresh = dict(zip(missing, clean_parallel(list(missing.values()), workers=workers)))
+        cleans = [fresh.get(h, c) for h, c in zip(hashes, cleans)]
+        store.add(np.array(list(fresh), dtype="S16"), list(fresh.values()))
+    # Saved even with nothing new, so the rows just used are stamped with this run
+    store.save()
+
+    cleans = [c if c is not None else "" for c in cleans]
+    print(f"Preprocessing cache: {len(texts) - len(missing)} rows reused, {len(missing)} cleaned")
+    return cleans
+
+
+def _features_key(vectorizer, cleans) -> str:
+    h = hashlib.sha256()
+    h.update(PREPROCESSOR_VERSION.encode())
+    h.update(type(vectorizer).__name__.encode())
+    h.update(repr(sorted(vectorizer.get_params().items())).encode())
+    h.update(row_hashes(cleans).tobytes())
+    return h.hexdigest()[:24]
+
+
+# vectorizer.fit_transform(cleans), or the fitted vectorizer and matrix saved
+# by an earlier run on exactly the same cleaned rows and settings
+def fit_transform_cached(vectorizer, cleans, cache_dir=CACHE_DIR):
+    cleans = list(cleans)
+    base   = os.path.join(cache_dir, f"features_{_features_key(vectorizer, cleans)}")
+
+    if os.path.exists(base + ".npz") and os.path.exists(base + ".vectorizer.pkl"):
+        with open(base + ".vectorizer.pkl", "rb") as f:
+            fitted = pickle.load(f)
+        os.utime(base + ".npz")
+        print(f"Feature cache: reused {os.path.basename(base)}")
+        return fitted, load_npz(base + ".npz")
+
+    features = vectorizer.fit_transform(cleans)
+    os.makedirs(cache_dir, exist_ok=True)
+    _write_atomic(base + ".vectorizer.pkl", lambda f: pickle.dump(vectorizer, f))
+    _write_atomic(base + ".npz", lambda f: save_npz(f, features))
+    _prune_features(cache_dir)
+    return vectorizer, features
+
+
+def _prune_features(cache_dir):
+    entries = sorted(glob.glob(os.path.join(cache_dir, "features_*.npz")), key=os.path.getmtime, reverse=True)
+    for path in entries[FEATURE_ENTRIES:]:
+        for stale in (path, path[:-len(".npz")] + ".vectorizer.pkl"):
+            if os.path.exists(stale):
+                os.remove(stale)
@@ -0,0 +1,49 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+CHUNK_SIZE = 2000   #Rows per task sent to a worker process
+
+
+# Split items into chunks, run func(chunk) -> list on a process pool and
+# return the concatenated results in input order.
+# func and initializer must be top-level functions so they can be pickled.
+# The initializer runs once per worker — use it to load heavy resources.
+def map_chunks(func, items, workers=None, chunk_size=CHUNK_SIZE, initializer=None):
+    items   = list(items)
+    workers = workers or os.cpu_count() or 1
+    chunks  = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+    # Not worth starting processes for a single chunk
+    if workers <= 1 or len(chunks) <= 1:
+        if initializer is not None:
+            initializer()
+        return [out for chunk in chunks for out in func(chunk)]
+
+    results = []
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), initializer=initializer) as pool:
+        for out in pool.map(func, chunks):
+            results.extend(out)
+    return results
+
+
+# Streaming version of map_chunks: take an iterable of chunks (e.g. from a
+# generator reading a file), yield func(chunk) for each one in input order.
+# At most workers * 2 chunks are in flight, so memory stays bounded however
+# long the input is.
+def imap_chunks(func, chunks, workers=1, initializer=None):
+    if workers <= 1:
+        if initializer is not None:
+            initializer()
+        for chunk in chunks:
+            yield func(chunk)
+        return
+
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer) as pool:
+        for chunk in chunks:
+            pending.append(pool.submit(func, chunk))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
@@ -1,28 +1,124 @@
 import os
-import pickle
-from dataclasses import dataclass
+import time
+import threading
+from dataclasses import dataclass, asdict, replace
 from typing import Optional
 
 import sys
 sys.path.insert(0, os.path.dirname(__file__))
-from preprocessor import clean_text
-from rules import apply_priority_rules, explain_override
+import preprocessor
+import sentiment
+from preprocessor import clean_many
+from rules import RULES_VERSION, apply_priority_rules_many, explain_override
 from sentiment import analyze, apply_sentiment_boost
+import registry
+import metrics
+from compact import CompactScorer
+from cache import PredictionCache, SharedCacheTier, make_key
 
-MODELS_DIR = os.path.join(os.path.dirname(__file__), "../models")
+BACKEND         = os.environ.get("PREDICT_BACKEND", "sklearn")  #"sklearn" (pickled joint model) or "compact" (memory-mapped export)
+RELOAD_INTERVAL = float(os.environ.get("MODEL_RELOAD_INTERVAL", "5"))   #Seconds between checks for a newly promoted model
 
+# Prediction cache — off unless PREDICTION_CACHE_SIZE > 0. PREDICTION_CACHE_DB
+# adds a SQLite tier shared by every worker on the host; TTL 0 means no expiry.
+CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", "0"))
+CACHE_TTL  = float(os.environ.get("PREDICTION_CACHE_TTL", "0")) or None
+CACHE_DB   = os.environ.get("PREDICTION_CACHE_DB", "")
 
-def load_model(filename):
-    path = os.path.join(MODELS_DIR, filename)
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"Model not found: {path}. Run src/train.py first.")
-    with open(path, "rb") as f:
-        return pickle.load(f)
+# Bump when the logic after the model changes (sentiment boost, rule handling)
+# so shared-tier entries written by older code stop matching
+PIPELINE_VERSION = "1"
 
+_cache  = PredictionCache(CACHE_SIZE, CACHE_TTL) if CACHE_SIZE > 0 else None
+_shared = SharedCacheTier(CACHE_DB, CACHE_TTL) if _cache is not None and CACHE_DB else None
 
-# Load once when module is imported — not on every prediction
-_cat_model = load_model("category_model.pkl")
-_pri_model = load_model("priority_model.pkl")
+# Exported on the API's /metrics endpoint. Stage timings are per classify_many
+# call, so a batch of 100 records one observation per stage, not 100.
+CLASSIFY_SECONDS = metrics.histogram("classify_seconds", "End-to-end classify_many latency")
+STAGE_SECONDS    = metrics.histogram("classify_stage_seconds", "Time spent in each classify stage", ["stage"])
+BATCH_SIZE       = metrics.histogram("classify_batch_size", "Complaints per classify_many call",
+                                     buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024))
+PREDICTIONS      = metrics.counter("predictions_total", "Complaints classified, by final category and priority",
+                                   ["category", "priority"])
+RULE_OVERRIDES   = metrics.counter("rule_overrides_total", "Predictions whose priority was set by a rule")
+SENTIMENT_BOOSTS = metrics.counter("sentiment_boosts_total", "Predictions whose priority was raised by sentiment")
+
+_clean_seconds     = STAGE_SECONDS.labels("clean")
+_model_seconds     = STAGE_SECONDS.labels("model")
+_rules_seconds     = STAGE_SECONDS.labels("rules")
+_sentiment_seconds = STAGE_SECONDS.labels("sentiment")
+
+
+# (category_classes, category_probs, priority_classes, priority_probs) for cleaned texts.
+# One vectorizer pass feeds both the category and priority heads.
+def score(model, cleans):
+    if isinstance(model, CompactScorer):
+        return model.score(cleans)
+    features = model["vectorizer"].transform(cleans)
+    return (
+        model["category"].classes_, model["category"].predict_proba(features),
+        model["priority"].classes_, model["priority"].predict_proba(features),
+    )
+
+
+# (version, model) being served. Loaded on the first prediction or warm_up(),
+# not at import, so importing this module stays cheap for CLI jobs and tests.
+# A reload builds the new pair off to the side and swaps it in with a single
+# assignment; a batch reads the pair once, so it never mixes two versions.
+_active     = None
+_model_lock = threading.Lock()     # one loader at a time; readers never wait
+
+
+def get_active():
+    if _active is None:
+        reload_model()
+    return _active
+
+
+def get_model():
+    return get_active()[1]
+
+
+def get_model_version() -> str:
+    return get_active()[0]
+
+
+# Load the promoted version if it is not the one being served. Returns True on a swap.
+def reload_model() -> bool:
+    global _active
+    with _model_lock:
+        version = registry.current_version() or registry.UNVERSIONED
+        if _active is not None and _active[0] == version:
+            return False
+        _active = (version, registry.load_version(version, BACKEND))
+        if _cache is not None:
+            _cache.clear()      # old-version entries can no longer be hit
+        return True
+
+
+# Poll for newly promoted versions on a daemon thread. A version that fails
+# to load is reported and the current one keeps serving.
+def watch_for_new_models(interval=RELOAD_INTERVAL):
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                if reload_model():
+                    print(f"Now serving model version {_active[0]}")
+            except Exception as e:
+                print(f"Model reload failed, still serving {_active[0] if _active else None}: {e}")
+
+    thread = threading.Thread(target=run, name="model-reload", daemon=True)
+    thread.start()
+    return thread
+
+
+# Load the model, NLTK data and VADER lexicon up front — call at server
+# startup so the first request does not pay for them
+def warm_up():
+    get_model()
+    preprocessor.warm_up()
+    sentiment.warm_up()
 
 
 @dataclass
@@ -37,46 +133,137 @@ class Prediction:
     sentiment_label:     str
     sentiment_score:     float
     sentiment_boosted:   bool
+    model_version:       str
 
 
 def classify(text: str) -> Prediction:
     if not text or not text.strip():
         raise ValueError("Complaint text cannot be empty.")
 
-    clean = clean_text(text)
+    return classify_many([text])[0]
+
+
+# Batch version of classify — one clean pass and one predict_proba call per model
+# for the whole list, instead of paying sklearn's per-call overhead per complaint.
+def classify_many(texts: list[str]) -> list[Prediction]:
+    for i, text in enumerate(texts):
+        if not text or not text.strip():
+            raise ValueError(f"Complaint text at index {i} cannot be empty.")
+
+    if not texts:
+        return []
+
+    start = time.perf_counter()
+    version, model = get_active()
+    if _cache is None:
+        predictions = _classify_uncached(texts, version, model)
+    else:
+        predictions = _classify_cached(texts, version, model)
+
+    CLASSIFY_SECONDS.observe(time.perf_counter() - start)
+    BATCH_SIZE.observe(len(texts))
+    for p in predictions:
+        PREDICTIONS.labels(p.category, p.priority).inc()
+        if p.rule_override:
+            RULE_OVERRIDES.inc()
+        if p.sentiment_boosted:
+            SENTIMENT_BOOSTS.inc()
+    return predictions
+
+
+# Look every text up in the memory cache, then the shared tier, and run the
+# pipeline once per distinct text still missing
+def _classify_cached(texts, version, model):
+    keys  = [make_key(t, version, f"{RULES_VERSION}/{PIPELINE_VERSION}") for t in texts]
+    first = {}      # key -> first text with that key, in input order
+    for key, text in zip(keys, texts):
+        first.setdefault(key, text)
+
+    found = {}
+    for key in first:
+        pred = _cache.get(key)
+        if pred is not None:
+            found[key] = pred
+
+    missing = [key for key in first if key not in found]
+    if missing and _shared is not None:
+        for key, value in _shared.get_many(missing).items():
+            found[key] = Prediction(**value)
+            _cache.put(key, found[key])
+        missing = [key for key in missing if key not in found]
+
+    if missing:
+        fresh = _classify_uncached([first[key] for key in missing], version, model)
+        for key, pred in zip(missing, fresh):
+            found[key] = pred
+            _cache.put(key, pred)
+        if _shared is not None:
+            _shared.put_many([(key, asdict(pred)) for key, pred in zip(missing, fresh)])
+
+    # Keys ignore surrounding whitespace, so echo back each caller's own text
+    return [
+        found[key] if found[key].complaint_text == text else replace(found[key], complaint_text=text)
+        for key, text in zip(keys, texts)
+    ]
+
+
+def _classify_uncached(texts, version, model):
+    with _clean_seconds.time():
+        cleans = clean_many(texts)
+    with _model_seconds.time():
+        cat_classes, cat_probs, pri_classes, pri_probs = score(model, cleans)
 
     # Category
-    cat_probs   = _cat_model.predict_proba([clean])[0]
-    cat_idx     = cat_probs.argmax()
-    category    = _cat_model.classes_[cat_idx]
-    cat_conf    = round(float(cat_probs[cat_idx]), 3)
+    cat_idx     = cat_probs.argmax(axis=1)
 
     # Priority (ML)
-    pri_probs   = _pri_model.predict_proba([clean])[0]
-    pri_idx     = pri_probs.argmax()
-    ml_priority = _pri_model.classes_[pri_idx]
-    pri_conf    = round(float(pri_probs[pri_idx]), 3)
+    pri_idx     = pri_probs.argmax(axis=1)
 
     # Rules override
-    # Rules override
-    final_priority, rule_triggered = apply_priority_rules(text, ml_priority)
-
-    # Sentiment boost
-    sentiment = analyze(text)
-    final_priority, sentiment_boosted = apply_sentiment_boost(final_priority, sentiment)
-
-    return Prediction(
-        complaint_text      = text,
-        category            = category,
-        category_confidence = cat_conf,
-        priority            = final_priority,
-        priority_confidence = pri_conf,
-        rule_override       = rule_triggered is not None,
-        rule_explanation    = explain_override(rule_triggered),
-        sentiment_label     = sentiment["label"],
-        sentiment_score     = sentiment["compound"],
-        sentiment_boosted   = sentiment_boosted,
-    )
+    ml_priorities = [pri_classes[j] for j in pri_idx]
+    with _rules_seconds.time():
+        rule_results = apply_priority_rules_many(texts, ml_priorities)
+
+    # Sentiment
+    with _sentiment_seconds.time():
+        sentiments = [analyze(text) for text in texts]
+
+    predictions = []
+    for i, text in enumerate(texts):
+        category    = cat_classes[cat_idx[i]]
+        cat_conf    = round(float(cat_probs[i, cat_idx[i]]), 3)
+        pri_conf    = round(float(pri_probs[i, pri_idx[i]]), 3)
+        final_priority, rule_triggered = rule_results[i]
+
+        # Sentiment boost
+        sentiment = sentiments[i]
+        final_priority, sentiment_boosted = apply_sentiment_boost(final_priority, sentiment)
+
+        predictions.append(Prediction(
+            complaint_text      = text,
+            category            = category,
+            category_confidence = cat_conf,
+            priority            = final_priority,
+            priority_confidence = pri_conf,
+            rule_override       = rule_triggered is not None,
+            rule_explanation    = explain_override(rule_triggered),
+            sentiment_label     = sentiment["label"],
+            sentiment_score     = sentiment["compound"],
+            sentiment_boosted   = sentiment_boosted,
+            model_version       = version,
+        ))
+
+    return predictions
+
+
+# Hit/miss/eviction counters for the prediction cache and its shared tier
+def get_prediction_cache_stats() -> dict:
+    if _cache is None:
+        return {"enabled": False}
+    stats = {"enabled": True, "memory": _cache.stats()}
+    if _shared is not None:
+        stats["shared"] = _shared.stats()
+    return stats
 
 
 if __name__ == "__main__":
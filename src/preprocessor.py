@@ -1,14 +1,69 @@
 import re
 import string
-import nltk
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
+import threading
+from functools import lru_cache
+
+from parallel import map_chunks
 
-STOP_WORDS = set(stopwords.words("english"))    # Use a set for faster lookups
 KEEP_WORDS = {"not", "no", "never", "without", "neither", "nor", "down", "slow", "wrong", "broken", "blocked", "failed", "missing"} #Negations and some words that can indicate negative sentiment or issues
-STOP_WORDS -= KEEP_WORDS   #Remove negations from stop words
 
-lemmatizer = WordNetLemmatizer()
+LEMMA_CACHE_SIZE = 50_000   #Distinct tokens kept in the token -> lemma cache
+
+# Bump whenever clean_text can produce different output (new regex, stop
+# words, lemmatizer change) — cached cleaned text from older versions is ignored
+PREPROCESSOR_VERSION = "1"
+
+# NLTK takes seconds to import and WordNet seconds more to load, so both wait
+# for first use (or warm_up()). The lock stops two threads loading WordNet at
+# once — NLTK's lazy corpus loader is not thread-safe.
+_stop_words = None
+_lemmatizer = None
+_load_lock  = threading.Lock()
+
+
+def get_stop_words() -> set:
+    global _stop_words
+    if _stop_words is None:
+        with _load_lock:
+            if _stop_words is None:
+                from nltk.corpus import stopwords
+                _stop_words = set(stopwords.words("english")) - KEEP_WORDS   #Remove negations from stop words
+    return _stop_words
+
+
+def get_lemmatizer():
+    global _lemmatizer
+    if _lemmatizer is None:
+        with _load_lock:
+            if _lemmatizer is None:
+                from nltk.stem import WordNetLemmatizer
+                lemmatizer = WordNetLemmatizer()
+                lemmatizer.lemmatize("warmup")      # forces the WordNet corpus to load
+                _lemmatizer = lemmatizer
+    return _lemmatizer
+
+# URLs, email addresses, numbers and punctuation in one left-to-right pass.
+# Gives the same result as removing URLs, then emails, then replacing numbers,
+# then stripping punctuation:
+#   - an email swallows its whole token, URL tail included, so it must start
+#     at the token start and see its "@" before any URL begins
+#   - otherwise a URL removes everything from "http"/"www" to the end of its token
+_URL_START = r"(?:http|www)\S"
+_NOISE_RE  = re.compile(
+    rf"(?<!\S)(?:(?!{_URL_START})\S)+@(?!{_URL_START})\S+"    # email
+    rf"|(?:http|www)\S+"                                      # URL
+    rf"|(\d+)"                                                # number
+    rf"|[{re.escape(string.punctuation)}]+"                   # punctuation
+)
+
+
+def _replace_noise(match):
+    return " num " if match.group(1) else ""
+
+
+@lru_cache(maxsize=LEMMA_CACHE_SIZE)
+def lemmatize(token: str) -> str:
+    return get_lemmatizer().lemmatize(token)
 
 
 def clean_text(text: str) -> str:
@@ -16,16 +71,43 @@ def clean_text(text: str) -> str:
         return ""
 
     text = text.lower()     #Convert to lowercase
-    text = re.sub(r"http\S+|www\S+", "", text) ##Remove URLs
-    text = re.sub(r"\S+@\S+", "", text)     ##Remove email addresses
-    text = re.sub(r"\d+", " num ", text)    ##Replace numbers with a placeholder
-    text = text.translate(str.maketrans("", "", string.punctuation))    ##Remove punctuation
+    text = _NOISE_RE.sub(_replace_noise, text)  ##Remove URLs, emails and punctuation, replace numbers with a placeholder
 
-    tokens = text.split()   
+    stop_words = get_stop_words()
     tokens = [
-        lemmatizer.lemmatize(t)
-        for t in tokens
-        if t not in STOP_WORDS and len(t) > 1
+        lemmatize(t)
+        for t in text.split()
+        if t not in stop_words and len(t) > 1
     ]   #Lemmatize and remove stop words and single-character tokens
 
-    return " ".join(tokens)
\ No newline at end of file
+    return " ".join(tokens)
+
+
+# Batch entry point — same output as clean_text on each item
+def clean_many(texts) -> list[str]:
+    return [clean_text(t) for t in texts]
+
+
+# Load stop words and WordNet now instead of on the first complaint.
+# Also the per-process initializer for clean_parallel workers.
+def warm_up():
+    get_stop_words()
+    get_lemmatizer()
+
+
+# Clean a large list of texts on a process pool, in chunks, keeping input order
+def clean_parallel(texts, workers=None) -> list[str]:
+    return map_chunks(clean_many, texts, workers=workers, initializer=warm_up)
+
+
+# Lemma cache hit rate, to help size LEMMA_CACHE_SIZE
+def get_cache_stats() -> dict:
+    info = lemmatize.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "hits"    : info.hits,
+        "misses"  : info.misses,
+        "size"    : info.currsize,
+        "maxsize" : info.maxsize,
+        "hit_rate": round(info.hits / lookups, 4) if lookups else 0.0,
+    }
@@ -0,0 +1,210 @@
+import os
+import sys
+import json
+import pickle
+import shutil
+import argparse
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+from compact import CompactScorer, export_compact
+
+MODELS_DIR       = os.environ.get("MODELS_DIR", os.path.join(os.path.dirname(__file__), "../models"))
+MODEL_FILE       = "joint_model.pkl"
+UNVERSIONED      = "unversioned"    #Reported for a model loaded from models/ itself, outside versions/
+LEGACY_PIPELINES = ("category_model.pkl", "priority_model.pkl")    #Two-pipeline layout of the original train.py
+
+# Versioned model layout — a version directory is written once under a staging
+# name, renamed into place when complete and never modified afterwards:
+#   versions/<version>/joint_model.pkl     pickled joint model
+#   versions/<version>/compact/            compact export (batch models only)
+#   versions/<version>/meta.json           kind, watermark, creation time
+#   CURRENT                                {"version": ...} — the served version
+#
+# Promotion rewrites CURRENT through os.replace, so a reader sees either the
+# old or the new version and never a partly written model.
+
+
+def _versions_dir():
+    return os.path.join(MODELS_DIR, "versions")
+
+
+def _current_file():
+    return os.path.join(MODELS_DIR, "CURRENT")
+
+
+def version_dir(version):
+    return os.path.join(_versions_dir(), version)
+
+
+def _new_version():
+    base    = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+    version = base
+    n = 1
+    while os.path.exists(version_dir(version)):
+        n += 1
+        version = f"{base}-{n}"
+    return version
+
+
+# Write model as a new immutable version and (by default) make it the served one
+def publish(model, promote_now=True, note="") -> str:
+    version = _new_version()
+    staging = os.path.join(_versions_dir(), f".staging-{version}")
+    os.makedirs(staging)
+
+    try:
+        with open(os.path.join(staging, MODEL_FILE), "wb") as f:
+            pickle.dump(model, f)
+        if model.get("kind", "batch") == "batch":
+            export_compact(model, os.path.join(staging, "compact"))
+
+        meta = {
+            "version"           : version,
+            "kind"              : model.get("kind", "batch"),
+            "feedback_watermark": model.get("feedback_watermark", 0),
+            "created_at"        : datetime.utcnow().isoformat(),
+            "note"              : note,
+        }
+        with open(os.path.join(staging, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+        os.rename(staging, version_dir(version))
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    print(f"Published model version {version}")
+    if promote_now:
+        promote(version)
+    return version
+
+
+# Point CURRENT at an existing version — also how to roll back
+def promote(version):
+    if not os.path.exists(os.path.join(version_dir(version), "meta.json")):
+        raise FileNotFoundError(f"Model version not found: {version}")
+
+    tmp = _current_file() + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"version": version, "promoted_at": datetime.utcnow().isoformat()}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, _current_file())
+    print(f"Promoted model version {version}")
+
+
+# Served version, or None before anything has been published
+def current_version():
+    try:
+        with open(_current_file()) as f:
+            return json.load(f)["version"]
+    except FileNotFoundError:
+        return None
+
+
+def list_versions() -> list[dict]:
+    if not os.path.isdir(_versions_dir()):
+        return []
+    versions = []
+    for name in sorted(os.listdir(_versions_dir())):
+        meta_path = os.path.join(version_dir(name), "meta.json")
+        if not name.startswith(".") and os.path.exists(meta_path):
+            with open(meta_path) as f:
+                versions.append(json.load(f))
+    return versions
+
+
+# Fill in fields that joint models saved before online retraining lack
+def upgrade_model(model):
+    model.setdefault("kind", "batch")
+    model.setdefault("feedback_watermark", 0)
+    return model
+
+
+# Join the original layout's two TF-IDF + LogisticRegression pipelines into a
+# joint model. The original train.py fitted both on the same rows with the
+# same settings, so their vectorizers are identical and one serves both heads.
+# A pair whose vectorizers differ cannot be joined and has to be retrained.
+def join_pipelines(category_pipeline, priority_pipeline):
+    vectorizer = category_pipeline.named_steps["tfidf"]
+    other      = priority_pipeline.named_steps["tfidf"]
+    if (vectorizer.get_params() != other.get_params() or vectorizer.vocabulary_ != other.vocabulary_
+            or not np.array_equal(vectorizer.idf_, other.idf_)):
+        raise ValueError("category_model.pkl and priority_model.pkl were fitted with different TF-IDF "
+                         "vocabularies and cannot share one. Retrain with python src/train.py.")
+    return {
+        "kind"              : "batch",
+        "vectorizer"        : vectorizer,
+        "category"          : category_pipeline.named_steps["clf"],
+        "priority"          : priority_pipeline.named_steps["clf"],
+        "feedback_watermark": 0,
+    }
+
+
+# The unversioned model in path: models/joint_model.pkl, or else the original
+# category_model.pkl + priority_model.pkl pair joined into one
+def _load_unversioned(path):
+    model_path = os.path.join(path, MODEL_FILE)
+    legacy     = [os.path.join(path, name) for name in LEGACY_PIPELINES]
+    if not os.path.exists(model_path) and all(os.path.exists(p) for p in legacy):
+        pipelines = []
+        for p in legacy:
+            with open(p, "rb") as f:
+                pipelines.append(pickle.load(f))
+        return join_pipelines(*pipelines)
+    return None
+
+
+# Load one version for the given backend ("sklearn" or "compact")
+def load_version(version, backend="sklearn"):
+    if version == UNVERSIONED:
+        path = MODELS_DIR
+    else:
+        path = version_dir(version)
+
+    if backend == "compact":
+        compact_path = os.path.join(path, "compact")
+        if not os.path.exists(os.path.join(compact_path, "manifest.json")):
+            raise FileNotFoundError(f"Compact model not found: {compact_path}. "
+                                    "Run src/compact.py, or publish with python src/registry.py import.")
+        return CompactScorer(compact_path)
+
+    if version == UNVERSIONED:
+        model = _load_unversioned(path)
+        if model is not None:
+            return model
+
+    model_path = os.path.join(path, MODEL_FILE)
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Model not found: {model_path}. Run src/train.py first.")
+    with open(model_path, "rb") as f:
+        return upgrade_model(pickle.load(f))
+
+
+# (version, model) for the served version, falling back to the legacy single-file layout
+def load_current(backend="sklearn"):
+    version = current_version() or UNVERSIONED
+    return version, load_version(version, backend)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect and promote versioned models.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="List published versions")
+    promote_cmd = sub.add_parser("promote", help="Serve an existing version (rollback included)")
+    promote_cmd.add_argument("version")
+    sub.add_parser("import", help="Publish models/joint_model.pkl, or the original category/priority "
+                                  "pipeline pair, as a version")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        current = current_version()
+        for meta in list_versions():
+            marker = "*" if meta["version"] == current else " "
+            print(f"{marker} {meta['version']}  {meta['kind']:<6}  watermark={meta['feedback_watermark']}  {meta['note']}")
+    elif args.command == "promote":
+        promote(args.version)
+    else:
+        publish(load_version(UNVERSIONED), note="imported from the unversioned models/ layout")
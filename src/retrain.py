@@ -1,22 +1,21 @@
 import os
 import sys
-import pickle
+import argparse
 import pandas as pd
-from sklearn.pipeline import Pipeline
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report
 
 sys.path.insert(0, os.path.dirname(__file__))
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../database"))
 
-from preprocessor import clean_text
-from db import get_all_feedback
+from preprocessor import clean_many
+from train import build_joint_model, build_online_joint_model, clean_column
+from registry import load_current, publish
+from db import get_all_feedback, get_feedback_since, migrate
 
-DATA_PATH  = os.path.join(os.path.dirname(__file__), "../data/complaints.csv")
-MODELS_DIR = os.path.join(os.path.dirname(__file__), "../models")
-SEED       = 42
+DATA_PATH       = os.path.join(os.path.dirname(__file__), "../data/complaints.csv")
+SEED            = 42
+FEEDBACK_EPOCHS = 5     #Passes over new corrections in incremental mode
 
 
 def load_original_data():
@@ -27,8 +26,8 @@ def load_original_data():
     return df
 
 
-def load_feedback_data():
-    rows = get_all_feedback()
+def load_feedback_data(rows=None):
+    rows = get_all_feedback() if rows is None else rows
     if not rows:
         return pd.DataFrame()
 
@@ -37,6 +36,7 @@ def load_feedback_data():
         # row = (id, complaint_id, complaint_text, predicted_cat,
         #        predicted_pri, correct_cat, correct_pri, is_correct, submitted_at)
         records.append({
+            "feedback_id"   : row[0],
             "complaint_text": row[2],
             "category"      : row[5],  # correct_category
             "priority"      : row[6],  # correct_priority
@@ -46,30 +46,8 @@ def load_feedback_data():
     return pd.DataFrame(records)
 
 
-def build_pipeline():
-    return Pipeline([
-        ("tfidf", TfidfVectorizer(
-            ngram_range=(1, 2),
-            max_features=5000,
-            sublinear_tf=True,
-            min_df=1,
-        )),
-        ("clf", LogisticRegression(
-            max_iter=1000,
-            class_weight="balanced",
-            random_state=SEED,
-        ))
-    ])
-
-
-def save_model(model, filename):
-    path = os.path.join(MODELS_DIR, filename)
-    with open(path, "wb") as f:
-        pickle.dump(model, f)
-    print(f"Saved -> {path}")
-
-
-def main():
+# Rebuild from scratch on the original data plus every feedback row
+def full_retrain(workers=None, online=False, use_cache=True):
     print("Loading original training data...")
     original = load_original_data()
     print(f"Original rows: {len(original)}")
@@ -87,7 +65,7 @@ def main():
         print(f"\nFeedback sources:\n{df['source'].value_counts()}")
 
     print("\nCleaning text...")
-    df["clean_text"] = df["complaint_text"].apply(clean_text)
+    df["clean_text"] = clean_column(df["complaint_text"], workers, use_cache)
 
     X     = df["clean_text"]
     y_cat = df["category"]
@@ -102,20 +80,82 @@ def main():
 
     print(f"\nTrain: {len(X_train)} | Test: {len(X_test)}")
 
-    print("\nRetraining Category model...")
-    cat_model = build_pipeline()
-    cat_model.fit(X_train, yc_train)
-    print(classification_report(cat_model.predict(X_test), yc_test, zero_division=0))
-    save_model(cat_model, "category_model.pkl")
+    print(f"\nRetraining joint Category + Priority model ({'online' if online else 'batch'})...")
+    if online:
+        model = build_online_joint_model(X_train, yc_train, yp_train)
+    else:
+        model = build_joint_model(X_train, yc_train, yp_train, use_cache)
+    model["feedback_watermark"] = 0 if feedback.empty else int(feedback["feedback_id"].max())
+
+    features_test = model["vectorizer"].transform(X_test)
+    print(classification_report(model["category"].predict(features_test), yc_test, zero_division=0))
+    print(classification_report(model["priority"].predict(features_test), yp_test, zero_division=0))
+    version = publish(model, note="full retrain" + (" (online)" if online else ""))
+
+    print(f"\nRetrain complete. Serving version {version}.")
 
-    print("\nRetraining Priority model...")
-    pri_model = build_pipeline()
-    pri_model.fit(X_train, yp_train)
-    print(classification_report(pri_model.predict(X_test), yp_test, zero_division=0))
-    save_model(pri_model, "priority_model.pkl")
 
-    print("\nRetrain complete. Models updated.")
+# Update an online model with only the feedback that arrived since its watermark
+def incremental_retrain():
+    base_version, model = load_current()
+    if model.get("kind") != "online":
+        print("The current model is a batch TF-IDF model and cannot be updated incrementally.")
+        print("Rebuild it once as an online model: python src/retrain.py --online")
+        return
+
+    watermark = model["feedback_watermark"]
+    feedback  = load_feedback_data(get_feedback_since(watermark))
+    if feedback.empty:
+        print(f"No new feedback since id {watermark}. Model unchanged.")
+        return
+
+    # partial_fit cannot learn a label the head was not built with
+    known = (feedback["category"].isin(model["category"].classes_) &
+             feedback["priority"].isin(model["priority"].classes_))
+    if not known.all():
+        print(f"Skipping {int((~known).sum())} feedback rows with unknown labels.")
+    new = feedback[known]
+    print(f"New feedback rows: {len(new)} (after id {watermark})")
+
+    if not new.empty:
+        features = model["vectorizer"].transform(clean_many(new["complaint_text"]))
+        before   = _accuracy(model, features, new)
+        for _ in range(FEEDBACK_EPOCHS):
+            model["category"].partial_fit(features, new["category"])
+            model["priority"].partial_fit(features, new["priority"])
+        after = _accuracy(model, features, new)
+        print(f"Accuracy on new feedback: category {before[0]:.0%} -> {after[0]:.0%}, "
+              f"priority {before[1]:.0%} -> {after[1]:.0%}")
+
+    model["feedback_watermark"] = int(feedback["feedback_id"].max())
+    version = publish(model, note=f"incremental update of {base_version}")
+    print(f"\nIncremental update complete. Serving version {version}, watermark -> {model['feedback_watermark']}")
+
+
+def _accuracy(model, features, df):
+    return (
+        (model["category"].predict(features) == df["category"].to_numpy()).mean(),
+        (model["priority"].predict(features) == df["priority"].to_numpy()).mean(),
+    )
+
+
+def main(workers=None, incremental=False, online=False, use_cache=True):
+    migrate()   # feedback table may not exist yet on a fresh install
+    if incremental:
+        incremental_retrain()
+    else:
+        full_retrain(workers, online=online, use_cache=use_cache)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Retrain the joint model on original data plus agent feedback.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Processes used for text cleaning (default: all cores)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Update the current online model with only the feedback received since the last run")
+    parser.add_argument("--online", action="store_true",
+                        help="Full rebuild as an online (hashing + SGD) model that supports --incremental")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Ignore the preprocessing/feature cache in cache/ and recompute everything")
+    args = parser.parse_args()
+    main(workers=args.workers, incremental=args.incremental, online=args.online, use_cache=not args.no_cache)
\ No newline at end of file
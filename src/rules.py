@@ -1,4 +1,7 @@
 import re
+import hashlib
+import threading
+import time
 from typing import Optional
 
 # Define high-priority patterns that indicate critical issues or severe dissatisfaction
@@ -23,18 +26,190 @@ HIGH_PRIORITY_PATTERNS = [
     r"didn.t sign up",
 ]
 
-# Precompile regex patterns for efficiency
-_COMPILED = [re.compile(p, re.IGNORECASE) for p in HIGH_PRIORITY_PATTERNS]
+# Changes whenever the pattern list does — part of the prediction cache key
+RULES_VERSION = hashlib.sha256("\n".join(HIGH_PRIORITY_PATTERNS).encode()).hexdigest()[:12]
+
+
+# "{m}", "{m,}", "{,n}", "{m,n}" — any other "{" (e.g. "price {") is a literal to re
+_QUANTIFIER = re.compile(r"\{\d*,?\d*\}")
+
+
+# Longest plain-text run that every match of pattern must contain, lowercased.
+# Returns "" when no such run can be read off the pattern (e.g. top-level "|").
+def _required_literal(pattern: str) -> str:
+    if re.compile(pattern).flags & re.VERBOSE:
+        return ""
+
+    runs, run = [], ""
+    depth, i = 0, 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\":
+            runs.append(run); run = ""
+            i += 2
+            continue
+        if c == "[":
+            runs.append(run); run = ""
+            i += 1
+            if i < len(pattern) and pattern[i] == "^":
+                i += 1
+            if i < len(pattern) and pattern[i] == "]":
+                i += 1
+            while i < len(pattern) and pattern[i] != "]":
+                i += 2 if pattern[i] == "\\" else 1
+            i += 1
+            continue
+        if c == "(":
+            depth += 1
+            runs.append(run); run = ""
+        elif c == ")":
+            depth -= 1
+        elif c == "|" and depth == 0:
+            return ""
+        elif depth == 0:
+            quantifier = _QUANTIFIER.match(pattern, i) if c == "{" else None
+            if c in "?*" or (quantifier and quantifier.group() != "{}"):
+                run = run[:-1]      # the preceding character is optional
+                runs.append(run); run = ""
+                if quantifier:
+                    i = quantifier.end() - 1
+            elif c in ".^$+}|":
+                runs.append(run); run = ""
+            else:
+                run += c
+        i += 1
+    runs.append(run)
+
+    literal = max(runs, key=len).lower()
+    return literal if literal.isascii() else ""
+
+
+class RuleEngine:
+    """
+    Matches a list of rule patterns against text, first rule in list order wins.
+
+    Each rule is indexed by a literal it cannot match without (e.g. "account"
+    for r"account.{0,10}blocked"). A text is lowercased once, every distinct
+    literal is checked with a plain substring test, and only rules whose
+    literal is present run their regex. Most texts hit few or no literals, so
+    the cost grows with the number of literals rather than regex scans.
+
+    Keeps per-rule evaluation counts, hits and regex time.
+    """
+
+    def __init__(self, patterns: list[str]):
+        self.patterns  = list(patterns)
+        self._compiled = [re.compile(p, re.IGNORECASE) for p in self.patterns]
+
+        # literal -> indexes of the rules that need it, in list order
+        self._by_literal = {}
+        self._always     = []   # rules with no usable literal run on every text
+        for i, p in enumerate(self.patterns):
+            literal = _required_literal(p)
+            if literal:
+                self._by_literal.setdefault(literal, []).append(i)
+            else:
+                self._always.append(i)
+
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def _candidates(self, text: str) -> list[int]:
+        # Non-ASCII text can case-fold onto ASCII letters in ways str.lower()
+        # does not mirror, so skip the prefilter rather than risk a miss.
+        if not text.isascii():
+            return list(range(len(self.patterns)))
+
+        lowered = text.lower()
+        candidates = list(self._always)
+        for literal, idxs in self._by_literal.items():
+            if literal in lowered:
+                candidates.extend(idxs)
+        candidates.sort()
+        return candidates
+
+    # Index of the first rule matching text, or None
+    def match(self, text: str) -> Optional[int]:
+        start = time.perf_counter()
+        evaluated = []
+        hit = None
+        for i in self._candidates(text):
+            t0 = time.perf_counter()
+            found = self._compiled[i].search(text)
+            evaluated.append((i, time.perf_counter() - t0))
+            if found:
+                hit = i
+                break
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self._texts   += 1
+            self._seconds += elapsed
+            for i, seconds in evaluated:
+                self._evaluations[i] += 1
+                self._rule_seconds[i] += seconds
+            if hit is not None:
+                self._hits[hit] += 1
+        return hit
+
+    def match_many(self, texts: list[str]) -> list[Optional[int]]:
+        return [self.match(t) for t in texts]
+
+    def reset_stats(self):
+        with self._lock:
+            self._texts        = 0
+            self._seconds      = 0.0
+            self._evaluations  = [0] * len(self.patterns)
+            self._hits         = [0] * len(self.patterns)
+            self._rule_seconds = [0.0] * len(self.patterns)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "texts_evaluated": self._texts,
+                "total_seconds"  : round(self._seconds, 6),
+                "matched"        : sum(self._hits),
+                "rules": [
+                    {
+                        "pattern"    : p,
+                        "evaluations": self._evaluations[i],
+                        "hits"       : self._hits[i],
+                        "seconds"    : round(self._rule_seconds[i], 6),
+                    }
+                    for i, p in enumerate(self.patterns)
+                ],
+            }
+
+
+# Compile once at import — shared by every request
+_engine = RuleEngine(HIGH_PRIORITY_PATTERNS)
 
 # This function checks if any of the high-priority patterns are present in the text.
 def apply_priority_rules(text: str, ml_priority: str) -> tuple[str, Optional[str]]:
-    for pattern, compiled in zip(HIGH_PRIORITY_PATTERNS, _COMPILED):
-        if compiled.search(text):
-            return "High", pattern
-    return ml_priority, None
+    idx = _engine.match(text)
+    if idx is None:
+        return ml_priority, None
+    return "High", _engine.patterns[idx]
+
+# Batch version of apply_priority_rules — one (priority, pattern) pair per text
+def apply_priority_rules_many(texts: list[str], ml_priorities: list[str]) -> list[tuple[str, Optional[str]]]:
+    results = []
+    for idx, ml_priority in zip(_engine.match_many(texts), ml_priorities):
+        if idx is None:
+            results.append((ml_priority, None))
+        else:
+            results.append(("High", _engine.patterns[idx]))
+    return results
+
+# Per-rule hit counts and evaluation time since startup (or the last reset)
+def get_rule_stats() -> dict:
+    return _engine.stats()
+
+def reset_rule_stats():
+    _engine.reset_stats()
 
 # This function generates an explanation for why the priority was overridden, if applicable.
 def explain_override(rule_pattern: Optional[str]) -> str:
     if rule_pattern is None:
         return "Priority set by ML model."
-    return f"Priority overridden to High — rule matched: '{rule_pattern}'"
\ No newline at end of file
+    return f"Priority overridden to High — rule matched: '{rule_pattern}'"
@@ -1,13 +1,29 @@
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
+import threading
 
-_analyzer = SentimentIntensityAnalyzer()
+# The VADER lexicon (and NLTK itself) load on first use or warm_up()
+_analyzer = None
+_analyzer_lock = threading.Lock()
 
 # Threshold below which we consider sentiment upgrade-worthy
 NEGATIVE_THRESHOLD = -0.5
 
 
+def get_analyzer():
+    global _analyzer
+    if _analyzer is None:
+        with _analyzer_lock:
+            if _analyzer is None:
+                from nltk.sentiment.vader import SentimentIntensityAnalyzer
+                _analyzer = SentimentIntensityAnalyzer()
+    return _analyzer
+
+
+def warm_up():
+    get_analyzer()
+
+
 def analyze(text: str) -> dict:
-    scores = _analyzer.polarity_scores(text)
+    scores = get_analyzer().polarity_scores(text)
     compound = scores["compound"]
 
     if compound <= -0.6:
@@ -0,0 +1,51 @@
+import os
+import sys
+import json
+import time
+import argparse
+import importlib
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../database"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../api"))
+
+
+# Startup steps in the order a server pays for them. Each one only counts what
+# earlier steps have not already loaded, so run this in a fresh interpreter.
+def _steps():
+    return [
+        ("import predict (no model)", lambda: importlib.import_module("predict")),
+        ("import database/db",        lambda: importlib.import_module("db")),
+        ("import flask",              lambda: importlib.import_module("flask")),
+        ("import api/app",            lambda: importlib.import_module("app")),
+        ("import nltk",               lambda: importlib.import_module("nltk")),
+        ("load stop words",           lambda: importlib.import_module("preprocessor").get_stop_words()),
+        ("load WordNet",              lambda: importlib.import_module("preprocessor").get_lemmatizer()),
+        ("load VADER lexicon",        lambda: importlib.import_module("sentiment").get_analyzer()),
+        ("load model",                lambda: importlib.import_module("predict").get_model()),
+        ("first classify",            lambda: importlib.import_module("predict").classify("My internet is down.")),
+    ]
+
+
+def run():
+    report = []
+    for name, step in _steps():
+        start = time.perf_counter()
+        step()
+        report.append({"step": name, "ms": round((time.perf_counter() - start) * 1000, 1)})
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Break down cold-start cost by component.")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    report = run()
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        total = 0.0
+        for row in report:
+            total += row["ms"]
+            print(f"{row['step']:<28} {row['ms']:>9.1f} ms   {total:>9.1f} ms total")
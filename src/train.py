@@ -1,15 +1,18 @@
 import os
+import time
 import pickle
+import argparse
 import pandas as pd
-from sklearn.pipeline import Pipeline
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
+from sklearn.feature_extraction.text import TfidfVectorizer, HashingVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.model_selection import train_test_split, cross_val_score
 from sklearn.metrics import classification_report
 
 import sys
 sys.path.insert(0, os.path.dirname(__file__))
-from preprocessor import clean_text
+from preprocessor import clean_parallel
+from feature_cache import clean_cached, fit_transform_cached
+from registry import publish, upgrade_model
 
 DATA_PATH  = os.path.join(os.path.dirname(__file__), "../data/complaints_final.csv")  #Path to the dataset CSV file
 MODELS_DIR = os.path.join(os.path.dirname(__file__), "../models")   #Directory to save trained models
@@ -31,48 +34,114 @@ def load_data():
     print(df["priority"].value_counts(), "\n")
     return df
 
-# Build a machine learning pipeline for text classification
-def build_pipeline():
-    return Pipeline([
-        ("tfidf", TfidfVectorizer(
-            ngram_range=(1, 2),
-            max_features=5000,
-            sublinear_tf=True,
-            min_df=1,
-        )), #Convert text to TF-IDF features
-        ("clf", LogisticRegression(
-            max_iter=1000,
-            class_weight="balanced",
-            random_state=SEED,
-        ))  #Train a logistic regression classifier with balanced class weights
-    ])
+# Clean a text column on all cores and report throughput.
+# With use_cache, rows cleaned by an earlier run are read back instead.
+def clean_column(texts, workers=None, use_cache=True):
+    workers = workers or os.cpu_count() or 1
+    start   = time.perf_counter()
+    if use_cache:
+        cleaned = clean_cached(texts, workers=workers)
+    else:
+        cleaned = clean_parallel(texts, workers=workers)
+    elapsed = time.perf_counter() - start
+    rate    = len(cleaned) / elapsed if elapsed > 0 else 0
+    print(f"Cleaned {len(cleaned)} rows in {elapsed:.1f}s ({rate:.0f} rows/s, {workers} workers)")
+    return cleaned
+
+# Build the TF-IDF featurizer shared by both classifier heads
+def build_vectorizer():
+    return TfidfVectorizer(
+        ngram_range=(1, 2),
+        max_features=5000,
+        sublinear_tf=True,
+        min_df=1,
+    )   #Convert text to TF-IDF features
+
+# Build one classifier head (category or priority)
+def build_classifier():
+    return LogisticRegression(
+        max_iter=1000,
+        class_weight="balanced",
+        random_state=SEED,
+    )   #Train a logistic regression classifier with balanced class weights
 # Why Logistic Regression? 
 # It's a strong baseline for text classification tasks, especially with TF-IDF features. 
 # It handles high-dimensional data well and provides interpretable coefficients, which can help identify important words or phrases influencing the predictions.
 
+# Fit one vectorizer and both heads on the same sparse matrix.
+# The artifact is a plain dict so it unpickles without importing this module.
+#   kind               — "batch" (TF-IDF + LR) or "online" (hashing + SGD, see below)
+#   feedback_watermark — id of the last feedback row the model has learned from
+def build_joint_model(X_train, y_cat, y_pri, use_cache=False):
+    if use_cache:
+        vectorizer, features = fit_transform_cached(build_vectorizer(), X_train)
+    else:
+        vectorizer = build_vectorizer()
+        features   = vectorizer.fit_transform(X_train)
+    return {
+        "kind"              : "batch",
+        "vectorizer"        : vectorizer,
+        "category"          : build_classifier().fit(features, y_cat),
+        "priority"          : build_classifier().fit(features, y_pri),
+        "feedback_watermark": 0,
+    }
+
+
+# Online variant — can be updated with partial_fit as feedback arrives.
+# Hashing needs no fitted vocabulary, so new words in corrections map to
+# features straight away; SGD with log loss still gives predict_proba.
+def build_hashing_vectorizer():
+    return HashingVectorizer(
+        ngram_range=(1, 2),
+        n_features=2 ** 18,
+        alternate_sign=False,
+        norm="l2",
+    )
+
+def build_online_classifier():
+    return SGDClassifier(
+        loss="log_loss",
+        alpha=1e-5,
+        max_iter=50,
+        tol=1e-4,
+        random_state=SEED,
+    )
+
+def build_online_joint_model(X_train, y_cat, y_pri):
+    vectorizer = build_hashing_vectorizer()
+    features   = vectorizer.transform(X_train)
+    return {
+        "kind"              : "online",
+        "vectorizer"        : vectorizer,
+        "category"          : build_online_classifier().fit(features, y_cat),
+        "priority"          : build_online_classifier().fit(features, y_pri),
+        "feedback_watermark": 0,
+    }
+
 
-# Evaluate the model and print classification metrics
-def evaluate(model, X_test, y_test, label):
+# Evaluate a classifier head on already-vectorized features and print classification metrics
+def evaluate(clf, features_test, y_test, label):
     print(f"\n{'='*50}")
     print(f"  {label}")
     print(f"{'='*50}")
-    y_pred = model.predict(X_test)
+    y_pred = clf.predict(features_test)
     print(classification_report(y_test, y_pred, zero_division=0))
 
-# Save the trained model to disk using pickle
-def save_model(model, filename):
+# Load a saved model from disk
+def load_saved_model(filename):
     path = os.path.join(MODELS_DIR, filename)
-    with open(path, "wb") as f:
-        pickle.dump(model, f)
-    print(f"Saved -> {path}")
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Model not found: {path}. Run src/train.py first.")
+    with open(path, "rb") as f:
+        return upgrade_model(pickle.load(f))
 
 
 # Main function to orchestrate data loading, preprocessing, model training, evaluation, and saving.
-def main():
+def main(workers=None, use_cache=True):
     df = load_data()
 
     print("Cleaning text...")
-    df["clean_text"] = df["complaint_text"].apply(clean_text)
+    df["clean_text"] = clean_column(df["complaint_text"], workers, use_cache)
 
     # Prepare features and labels for both category and priority classification
     X    = df["clean_text"]
@@ -90,22 +159,23 @@ def main():
     # Print the number of training and testing samples for verification
     print(f"Train: {len(X_train)} | Test: {len(X_test)}\n")
 
-    # Train and evaluate the category classification model
-    print("Training Category model...")
-    cat_model = build_pipeline()
-    cat_model.fit(X_train, yc_train)
-    evaluate(cat_model, X_test, yc_test, "CATEGORY")
-    save_model(cat_model, "category_model.pkl")
+    # Train both heads on one shared TF-IDF vocabulary
+    print("Training joint Category + Priority model...")
+    model = build_joint_model(X_train, yc_train, yp_train, use_cache)
 
-    # Train and evaluate the priority classification model
-    print("\nTraining Priority model...")
-    pri_model = build_pipeline()
-    pri_model.fit(X_train, yp_train)
-    evaluate(pri_model, X_test, yp_test, "PRIORITY")
-    save_model(pri_model, "priority_model.pkl")
+    features_test = model["vectorizer"].transform(X_test)
+    evaluate(model["category"], features_test, yc_test, "CATEGORY")
+    evaluate(model["priority"], features_test, yp_test, "PRIORITY")
+    version = publish(model, note="train.py")
 
-    print("\nDone. Both models saved.")
+    print(f"\nDone. Joint model saved as version {version}.")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Train the joint category + priority model.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Processes used for text cleaning (default: all cores)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Ignore the preprocessing/feature cache in cache/ and recompute everything")
+    args = parser.parse_args()
+    main(workers=args.workers, use_cache=not args.no_cache)
\ No newline at end of file
@@ -0,0 +1,119 @@
+import sys
+import json
+import asyncio
+import threading
+sys.path.insert(0, 'api')
+sys.path.insert(0, 'src')
+
+import batcher
+import asgi
+import app as flask_api
+from predict import classify
+
+
+# Drive the ASGI app directly: one request in, (status, JSON body) out
+async def call(method, path, payload=None):
+    body = json.dumps(payload).encode() if payload is not None else b""
+    scope = {"type": "http", "method": method, "path": path,
+             "headers": [(b"content-type", b"application/json")]}
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await asgi.app(scope, receive, send)
+    return sent[0]["status"], json.loads(sent[1]["body"])
+
+
+def test_concurrent_requests_share_batches_and_match_classify(temp_db, monkeypatch):
+    texts = [f"I was charged twice on my bill, invoice {i}" for i in range(20)]
+    texts[3] = "My internet has been down for 3 days and nobody is responding."
+    calls = []
+
+    func = asgi.batcher.func
+    monkeypatch.setattr(asgi.batcher, "func", lambda items: calls.append(len(items)) or func(items))
+    monkeypatch.setattr(asgi.batcher, "max_batch", 8)
+    monkeypatch.setattr(asgi.batcher, "max_wait", 0.05)
+
+    async def run():
+        asgi.batcher.start()
+        try:
+            return await asyncio.gather(*(call("POST", "/classify-complaint", {"text": t}) for t in texts))
+        finally:
+            await asgi.batcher.stop()
+
+    results = asyncio.run(run())
+
+    # How the 20 split depends on timing; what is guaranteed is that they were
+    # all classified, never more than max_batch at a time, and not one by one
+    assert sum(calls) == 20 and max(calls) <= 8 and len(calls) < 20
+    for text, (status, body) in zip(texts, results):
+        expected = classify(text)
+        assert status == 200
+        assert (body["category"], body["priority"]) == (expected.category, expected.priority)
+    assert temp_db.count_complaints() == 20
+    assert "microbatch_queue_wait_seconds_count" in batcher.metrics.render()
+
+
+def test_batch_failure_reaches_every_waiting_request():
+    async def run():
+        failing = batcher.MicroBatcher(lambda items: 1 / 0, max_wait=0.01)
+        failing.start()
+        try:
+            return await asyncio.gather(*(failing.submit(i) for i in range(3)), return_exceptions=True)
+        finally:
+            await failing.stop()
+
+    assert all(isinstance(r, ZeroDivisionError) for r in asyncio.run(run()))
+
+
+def test_stop_finishes_the_running_batch_and_fails_the_rest():
+    entered, release = threading.Event(), threading.Event()
+
+    def slow(items):
+        entered.set()
+        release.wait(5)
+        return [item * 10 for item in items]
+
+    async def run():
+        mb = batcher.MicroBatcher(slow, max_batch=2, max_wait=0.01).start()
+        calls = [asyncio.ensure_future(mb.submit(i)) for i in range(3)]
+        while not entered.is_set():
+            await asyncio.sleep(0.005)
+        asyncio.get_running_loop().call_later(0.05, release.set)
+        await mb.stop()
+        return await asyncio.gather(*calls, return_exceptions=True)
+
+    first, second, queued = asyncio.run(run())
+    assert (first, second) == (0, 10)
+    assert isinstance(queued, RuntimeError)
+
+
+def test_stop_fails_requests_still_being_collected():
+    async def run():
+        mb = batcher.MicroBatcher(lambda items: items, max_batch=8, max_wait=10).start()
+        calls = [asyncio.ensure_future(mb.submit(i)) for i in range(2)]
+        await asyncio.sleep(0.05)       # both taken off the queue, waiting for the batch to fill
+        await mb.stop()
+        return await asyncio.gather(*calls, return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(run()))
+
+
+def test_validation_errors():
+    status, body = asyncio.run(call("POST", "/classify-complaint", {"text": "   "}))
+    assert status == 400 and "required" in body["error"]
+    status, _ = asyncio.run(call("GET", "/classify-complaint"))
+    assert status == 405
+
+
+def test_validation_matches_the_flask_endpoint():
+    client = flask_api.app.test_client()
+    for payload in ({"text": "x" * (flask_api.MAX_TEXT_LENGTH + 1)}, {"text": 42}, {"text": ""}, {}, ["text"]):
+        status, body = asyncio.run(call("POST", "/classify-complaint", payload))
+        response = client.post("/classify-complaint", json=payload)
+        assert status == response.status_code == 400
+        assert body == response.get_json(), payload
@@ -0,0 +1,36 @@
+import sys
+sys.path.insert(0, 'api')
+
+import app as api
+
+
+def test_batch_classifies_in_order_and_commits_once(temp_db, monkeypatch):
+    inserts = []
+    insert = temp_db.insert_complaint_rows
+    monkeypatch.setattr(temp_db, "insert_complaint_rows", lambda rows: inserts.append(len(rows)) or insert(rows))
+
+    response = api.app.test_client().post("/classify-complaint/batch", json=[
+        "Refund not received after 30 days.",
+        {"text": "  My internet is down  "},
+        "I was charged twice this month.",
+    ])
+    assert response.status_code == 200
+    results = response.get_json()
+    assert [r["complaint_text"] for r in results][1] == "My internet is down"
+    assert len({r["classified_at"] for r in results}) == 1
+    assert inserts == [3]
+    assert temp_db.count_complaints() == 3
+
+
+def test_batch_rejects_bad_items_before_classifying_any(temp_db, monkeypatch):
+    client = api.app.test_client()
+
+    response = client.post("/classify-complaint/batch", json=["Refund please", {"text": ""}, 42])
+    assert response.status_code == 400
+    assert response.get_json()["error"].startswith("Item 1:")
+
+    monkeypatch.setattr(api, "MAX_BATCH_SIZE", 2)
+    assert client.post("/classify-complaint/batch", json=["a", "b", "c"]).status_code == 400
+    assert client.post("/classify-complaint/batch", json=[]).status_code == 400
+    assert client.post("/classify-complaint/batch", json={"text": "not a list"}).status_code == 400
+    assert temp_db.count_complaints() == 0
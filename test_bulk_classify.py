@@ -0,0 +1,103 @@
+import sys
+import json
+import tempfile
+sys.path.insert(0, 'src')
+
+import pandas as pd
+import bulk_classify
+
+
+def _read(path):
+    rows = [json.loads(line) for line in open(path)]
+    for r in rows:
+        r.pop("classified_at")
+    return rows
+
+
+def test_resume_after_interruption_matches_full_run():
+    with tempfile.TemporaryDirectory() as tmp:
+        source = pd.read_csv("data/complaints_final.csv").head(45)
+        source.loc[3, "complaint_text"] = ""
+        source.to_csv(f"{tmp}/in.csv", index=False)
+
+        bulk_classify.run(f"{tmp}/in.csv", f"{tmp}/full.jsonl", chunk_size=10)
+
+        # Fail on the third chunk, after two chunks were written and checkpointed
+        original, calls = bulk_classify.classify_chunk, []
+        def flaky(records, text_field):
+            calls.append(1)
+            if len(calls) == 3:
+                raise KeyboardInterrupt
+            return original(records, text_field)
+
+        bulk_classify.classify_chunk = flaky
+        try:
+            bulk_classify.run(f"{tmp}/in.csv", f"{tmp}/resumed.jsonl", chunk_size=10)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            bulk_classify.classify_chunk = original
+
+        assert len(_read(f"{tmp}/resumed.jsonl")) == 20
+        bulk_classify.run(f"{tmp}/in.csv", f"{tmp}/resumed.jsonl", chunk_size=10, resume=True)
+
+        full = _read(f"{tmp}/full.jsonl")
+        assert len(full) == 45
+        assert full[3]["error"] and full[3]["category"] is None
+        assert _read(f"{tmp}/resumed.jsonl") == full
+
+
+def test_db_resume_after_crash_before_checkpoint_inserts_each_row_once(temp_db, tmp_path, monkeypatch):
+    source = pd.read_csv("data/complaints_final.csv").head(35)
+    source.loc[3, "complaint_text"] = ""
+    source.to_csv(tmp_path / "in.csv", index=False)
+
+    # Crash after the third chunk is committed to the database but before its
+    # checkpoint file is written
+    original, calls = bulk_classify.save_checkpoint, []
+    def crash(path, state):
+        calls.append(1)
+        if len(calls) == 3:
+            raise KeyboardInterrupt
+        original(path, state)
+
+    monkeypatch.setattr(bulk_classify, "save_checkpoint", crash)
+    try:
+        bulk_classify.run(str(tmp_path / "in.csv"), to_db=True, chunk_size=10)
+    except KeyboardInterrupt:
+        pass
+    assert temp_db.count_complaints() == 29
+    monkeypatch.setattr(bulk_classify, "save_checkpoint", original)
+
+    bulk_classify.run(str(tmp_path / "in.csv"), to_db=True, chunk_size=10, resume=True)
+    texts = [row[1] for row in temp_db.get_all_complaints()]
+    assert sorted(texts) == sorted(t for t in source["complaint_text"] if t)
+    assert temp_db.get_bulk_progress(str(tmp_path / "in.csv")) == 0
+
+
+def test_jsonl_values_that_are_not_objects_are_bad_rows(tmp_path):
+    lines = ['{"complaint_text": "My internet has been down for 3 days"}', "[1]", '"x"', "42",
+             '{"complaint_text": "I was charged twice this month"}']
+    (tmp_path / "in.jsonl").write_text("\n".join(lines) + "\n")
+
+    assert bulk_classify.run(str(tmp_path / "in.jsonl"), str(tmp_path / "out.jsonl")) == 5
+    rows = _read(tmp_path / "out.jsonl")
+    assert [r["error"] is None for r in rows] == [True, False, False, False, True]
+    assert "not an object" in rows[1]["error"] and rows[1]["category"] is None
+
+
+def test_malformed_jsonl_lines_are_bad_rows(tmp_path):
+    lines = ['{"complaint_text": "My internet has been down for 3 days"}', "{bad json",
+             '{"complaint_text": "I was charged twice this month"}']
+    (tmp_path / "in.jsonl").write_text("\n".join(lines) + "\n")
+
+    # Two workers: the stand-in for the bad line has to cross a process boundary
+    assert bulk_classify.run(str(tmp_path / "in.jsonl"), str(tmp_path / "out.jsonl"), chunk_size=1, workers=2) == 3
+    rows = _read(tmp_path / "out.jsonl")
+    assert [r["error"] is None for r in rows] == [True, False, True]
+    assert rows[1]["error"].startswith("invalid JSON") and rows[1]["category"] is None
+
+
+if __name__ == "__main__":
+    test_resume_after_interruption_matches_full_run()
+    print("Bulk classification checks passed.")
@@ -0,0 +1,46 @@
+import sys
+import time
+import tempfile
+sys.path.insert(0, 'src')
+from cache import PredictionCache, SharedCacheTier, make_key
+
+
+def test_key_ignores_outer_whitespace_only():
+    assert make_key("  Refund not received\n", "v1", "r1") == make_key("Refund not received", "v1", "r1")
+    assert make_key("refund not received", "v1", "r1") != make_key("Refund not received", "v1", "r1")
+    assert make_key("Refund not received", "v2", "r1") != make_key("Refund not received", "v1", "r1")
+    assert make_key("Refund not received", "v1", "r2") != make_key("Refund not received", "v1", "r1")
+
+
+def test_lru_eviction_and_ttl():
+    cache = PredictionCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)          # evicts "b", the least recently used
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (3, 1, 1)
+
+    cache = PredictionCache(maxsize=2, ttl=0.01)
+    cache.put("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_shared_tier_round_trip():
+    with tempfile.TemporaryDirectory() as tmp:
+        tier = SharedCacheTier(f"{tmp}/cache.db")
+        tier.put_many([("a", {"category": "Billing"})])
+        assert tier.get_many(["a", "b"]) == {"a": {"category": "Billing"}}
+        assert SharedCacheTier(f"{tmp}/cache.db").get_many(["a"]) == {"a": {"category": "Billing"}}
+
+
+if __name__ == "__main__":
+    test_key_ignores_outer_whitespace_only()
+    test_lru_eviction_and_ttl()
+    test_shared_tier_round_trip()
+    print("Prediction cache checks passed.")
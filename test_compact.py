@@ -0,0 +1,52 @@
+import sys
+sys.path.insert(0, 'src')
+
+import numpy as np
+import pytest
+from sklearn.base import clone
+from compact import CompactScorer, export_compact
+
+
+# The training rows plus an empty text and texts with unseen words
+@pytest.fixture(scope="module")
+def complaints(training_data):
+    return training_data[1] + [
+        "",
+        "unseen zorblax words only",
+        "internet down num day work home",
+    ]
+
+
+def test_compact_matches_sklearn(trained_model, complaints, tmp_path):
+    model = trained_model
+    export_compact(model, str(tmp_path))
+    scorer = CompactScorer(str(tmp_path))
+
+    features = model["vectorizer"].transform(complaints)
+    assert abs(features - scorer.transform(complaints)).max() < 1e-12
+
+    for head in ("category", "priority"):
+        expected = model[head].predict_proba(features)
+        actual   = scorer.predict_proba(scorer.transform(complaints), head)
+        assert list(scorer.classes[head]) == list(model[head].classes_)
+        assert np.allclose(actual, expected, atol=1e-10), head
+
+
+@pytest.mark.parametrize("settings", [
+    {"binary": True},
+    {"use_idf": False},
+    {"norm": "l1"},
+    {"norm": None, "sublinear_tf": True},
+])
+def test_compact_reproduces_vectorizer_settings(settings, trained_model, training_data, complaints, tmp_path):
+    vectorizer = clone(trained_model["vectorizer"]).set_params(**settings).fit(training_data[1])
+    export_compact(dict(trained_model, vectorizer=vectorizer), str(tmp_path))
+    scorer = CompactScorer(str(tmp_path))
+    assert abs(vectorizer.transform(complaints) - scorer.transform(complaints)).max() < 1e-12
+
+
+def test_compact_rejects_custom_tokenizer(trained_model, training_data, tmp_path):
+    vectorizer = clone(trained_model["vectorizer"]).set_params(tokenizer=str.split, token_pattern=None)
+    vectorizer.fit(training_data[1])
+    with pytest.raises(ValueError, match="tokenizer"):
+        export_compact(dict(trained_model, vectorizer=vectorizer), str(tmp_path))
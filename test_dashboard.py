@@ -0,0 +1,47 @@
+import importlib.util
+
+import pytest
+
+# Loaded under its own name — api/app.py is also imported as "app" by other tests
+_spec     = importlib.util.spec_from_file_location("dashboard_app", "dashboard/app.py")
+dashboard = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(dashboard)
+
+@pytest.fixture
+def db(temp_db):
+    dashboard.cached_body.cache_clear()     # the change counter starts over in every new database
+    temp_db.save_complaints([(f"complaint {i}", "Billing" if i % 2 else "Technical", "High", i % 3 == 0)
+                             for i in range(5)])
+    return temp_db
+
+
+def test_unchanged_poll_is_304_and_writes_invalidate(db):
+    client = dashboard.app.test_client()
+    first = client.get("/api/summary")
+    assert first.status_code == 200
+    assert first.get_json()["total"] == 5
+    assert first.headers["ETag"] and first.headers["Last-Modified"]
+
+    again = client.get("/api/summary", headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304 and again.data == b""
+
+    db.save_complaint("one more", "Billing", "Low", False)
+    after_write = client.get("/api/summary", headers={"If-None-Match": first.headers["ETag"]})
+    assert after_write.status_code == 200
+    assert after_write.get_json()["total"] == 6
+
+
+def test_complaints_page_filters_and_cursors(db):
+    client = dashboard.app.test_client()
+    page = client.get("/api/complaints?category=Billing&limit=1").get_json()
+    assert page["matching"] == 2
+    assert [c["category"] for c in page["complaints"]] == ["Billing"]
+    assert page["newer"] is None and page["older"] == page["complaints"][0]["id"]
+
+    older = client.get(f"/api/complaints?category=Billing&limit=1&before={page['older']}").get_json()
+    assert older["complaints"][0]["id"] < page["complaints"][0]["id"]
+    assert older["newer"] == older["complaints"][0]["id"]
+
+    assert client.get("/api/trend").get_json()[0]["count"] == 5
+    assert client.get("/").status_code == 200
+
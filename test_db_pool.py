@@ -0,0 +1,74 @@
+import os
+import sqlite3
+import threading
+
+import pytest
+
+
+def test_connections_use_wal(temp_db):
+    with temp_db.connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+# Threads holding a connection at the same time never share one; released
+# connections go back to the pool and are reused
+def test_one_connection_per_thread(temp_db):
+    barrier, held = threading.Barrier(3), []
+
+    def hold():
+        with temp_db.connection() as conn:
+            held.append(conn)
+            barrier.wait()
+
+    threads = [threading.Thread(target=hold) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len({id(c) for c in held}) == 3
+    with temp_db.connection() as conn:
+        assert any(conn is c for c in held)
+
+
+def test_forked_child_opens_its_own_connection(temp_db):
+    with temp_db.connection() as parent_conn:
+        pass
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            with temp_db.connection() as conn:
+                ok = conn is not parent_conn and conn.execute("SELECT COUNT(*) FROM complaints").fetchone() == (0,)
+            os._exit(0 if ok else 1)
+        except BaseException:
+            os._exit(2)
+    assert os.waitpid(pid, 0)[1] == 0
+
+    with temp_db.connection() as conn:
+        assert conn is parent_conn
+
+
+def test_forked_child_never_closes_the_parents_connections(temp_db):
+    with temp_db.connection() as parent_conn:
+        pass
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            temp_db.close_connections()
+            parent_conn.total_changes       # raises ProgrammingError once closed
+            os._exit(0)
+        except BaseException:
+            os._exit(1)
+    assert os.waitpid(pid, 0)[1] == 0
+
+
+def test_close_connections_empties_the_pool(temp_db):
+    with temp_db.connection() as conn:
+        pass
+    temp_db.close_connections()
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+    with temp_db.connection() as fresh:
+        assert fresh is not conn
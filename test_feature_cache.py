@@ -0,0 +1,71 @@
+import sys
+import tempfile
+sys.path.insert(0, 'src')
+
+import numpy as np
+import pandas as pd
+import feature_cache
+from preprocessor import clean_many
+from train import build_vectorizer
+from feature_cache import CleanTextStore, clean_cached, fit_transform_cached, row_hashes
+
+texts = pd.read_csv("data/complaints.csv")["complaint_text"].tolist()
+
+
+def test_only_changed_rows_are_cleaned():
+    with tempfile.TemporaryDirectory() as tmp:
+        assert clean_cached(texts, workers=1, cache_dir=tmp) == clean_many(texts)
+
+        changed = texts[:5] + ["My bill went up by 40 dollars!", None]
+        assert clean_cached(changed, workers=1, cache_dir=tmp) == clean_many(changed)
+        assert len(CleanTextStore(f"{tmp}/clean_text_v1.npz")) == len(set(texts)) + 1
+
+
+def test_store_buffers_adds_and_prunes_unused_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(feature_cache, "CLEAN_RUNS", 2)
+    path  = str(tmp_path / "clean.npz")
+    store = CleanTextStore(path)
+    for i in range(3):
+        store.add(row_hashes([f"row {i}"]), [f"clean {i}"])
+    assert len(store) == 3 and not (tmp_path / "clean.npz").exists()
+    assert store.lookup(row_hashes(["row 1", "other"])) == ["clean 1", None]
+    store.save()
+
+    # "row 0" is used in every later run; the other two go stale after two runs
+    for run in range(2):
+        store = CleanTextStore(path)
+        assert store.lookup(row_hashes(["row 0"])) == ["clean 0"]
+        store.save()
+    store = CleanTextStore(path)
+    assert len(store) == 1 and store.lookup(row_hashes(["row 0", "row 1"])) == ["clean 0", None]
+
+    # Over the size cap, the least recently used rows go first
+    monkeypatch.setattr(feature_cache, "CLEAN_ENTRIES", 2)
+    store.add(row_hashes(["row 5", "row 6"]), ["clean 5", "clean 6"])
+    store.save()
+    assert CleanTextStore(path).lookup(row_hashes(["row 0", "row 5", "row 6"])) == [None, "clean 5", "clean 6"]
+
+
+def test_store_reads_files_without_run_stamps(tmp_path):
+    path   = str(tmp_path / "clean.npz")
+    hashes = np.sort(row_hashes(["a", "b"]))
+    np.savez(path, hashes=hashes, offsets=np.array([0, 1, 3]), blob=np.frombuffer(b"xyz", dtype=np.uint8))
+    store = CleanTextStore(path)
+    assert store.lookup(hashes) == ["x", "yz"]
+    store.save()
+    assert CleanTextStore(path).lookup(hashes) == ["x", "yz"]
+
+
+def test_features_are_reused_for_identical_rows():
+    cleans = clean_many(texts)
+    with tempfile.TemporaryDirectory() as tmp:
+        _, first = fit_transform_cached(build_vectorizer(), cleans, cache_dir=tmp)
+        vectorizer, second = fit_transform_cached(build_vectorizer(), cleans, cache_dir=tmp)
+        assert abs(first - second).max() == 0
+        assert abs(vectorizer.transform(cleans) - first).max() < 1e-12   # fit_transform vs transform rounding
+
+
+if __name__ == "__main__":
+    test_only_changed_rows_are_cleaned()
+    test_features_are_reused_for_identical_rows()
+    print("Feature cache checks passed.")
@@ -0,0 +1,66 @@
+import sqlite3
+
+
+def test_counters_match_a_full_scan(temp_db):
+    db = temp_db
+    rows = [
+        ("Billing", "High", "Billing", "High", "v1"),
+        ("Billing", "High", "Technical", "High", "v1"),
+        ("Technical", "Low", "Technical", "Medium", "v2"),
+        ("Technical", "Low", "Technical", "Low", None),
+    ]
+    for i, (pc, pp, cc, cp, version) in enumerate(rows):
+        db.save_feedback(i, "text", pc, pp, cc, cp, model_version=version)
+
+    total, correct = sqlite3.connect(db.DB_PATH).execute(
+        "SELECT COUNT(*), SUM(is_correct) FROM feedback").fetchone()
+    assert db.get_feedback_accuracy() == {"total": total, "correct": correct, "accuracy": 0.5}
+    assert db.get_recent_feedback_accuracy(2)["correct"] == 1
+
+    by_category = db.get_feedback_accuracy_since(24, "category")
+    assert by_category["Billing"]["category_accuracy"] == 0.5
+    assert by_category["Technical"]["priority_accuracy"] == 0.5
+    assert set(db.get_feedback_accuracy_since(24, "model_version")) == {"", "v1", "v2"}
+
+
+
+def test_recent_accuracy_counts_the_newest_rows_across_id_gaps(temp_db):
+    db = temp_db
+    for i, correct in enumerate([False, True, False, True, True]):
+        db.save_feedback(i, "text", "Billing", "High", "Billing" if correct else "Delivery", "High")
+    with sqlite3.connect(db.DB_PATH) as conn:
+        conn.execute("DELETE FROM feedback WHERE id IN (3, 4)")
+
+    # Newest three rows are ids 5, 2 and 1
+    assert db.get_recent_feedback_accuracy(3) == {"total": 3, "correct": 2, "accuracy": round(2 / 3, 3)}
+    assert db.get_recent_feedback_accuracy(10)["total"] == 3
+    assert db.get_recent_feedback_accuracy(0)["total"] == 0
+
+
+def test_counters_follow_updates(temp_db):
+    db = temp_db
+    db.save_feedback(1, "text", "Billing", "High", "Billing", "High", model_version="v1")
+    db.save_feedback(2, "text", "Billing", "High", "Technical", "High", model_version="v1")
+    db.save_feedback(3, "text", "Technical", "Low", "Technical", "Low", model_version="v2")
+    with sqlite3.connect(db.DB_PATH) as conn:
+        conn.execute("UPDATE feedback SET correct_category = 'Billing', is_correct = 1 WHERE id = 2")
+        conn.execute("UPDATE feedback SET model_version = 'v1', submitted_at = '2024-01-01T08:00:00' WHERE id = 3")
+        conn.execute("UPDATE feedback SET predicted_priority = 'Low', is_correct = 0 WHERE id = 1")
+
+        totals = conn.execute("SELECT model_version, total, correct FROM feedback_totals WHERE total != 0").fetchall()
+        assert sorted(totals) == conn.execute("""
+            SELECT COALESCE(model_version, ''), COUNT(*), SUM(is_correct) FROM feedback GROUP BY 1 ORDER BY 1
+        """).fetchall()
+
+        hourly = conn.execute("""
+            SELECT bucket, predicted_category, predicted_priority, model_version,
+                   total, correct, category_correct, priority_correct
+            FROM feedback_rollup_hourly WHERE total != 0 ORDER BY 1, 2, 3, 4
+        """).fetchall()
+        assert hourly == conn.execute("""
+            SELECT substr(submitted_at, 1, 13), predicted_category, predicted_priority, COALESCE(model_version, ''),
+                   COUNT(*), SUM(is_correct), SUM(predicted_category = correct_category),
+                   SUM(predicted_priority = correct_priority)
+            FROM feedback GROUP BY 1, 2, 3, 4 ORDER BY 1, 2, 3, 4
+        """).fetchall()
+    assert db.get_feedback_accuracy() == {"total": 3, "correct": 2, "accuracy": 0.667}
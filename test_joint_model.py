@@ -0,0 +1,60 @@
+import sys
+import pickle
+sys.path.insert(0, 'src')
+
+import numpy as np
+import pytest
+from sklearn.pipeline import Pipeline
+
+import registry
+from train import build_vectorizer, build_classifier
+
+
+# The joint model must score exactly like the two separate TF-IDF + LR
+# pipelines it replaced: same vectorizer settings on the same data give the
+# same features, so each head fits and predicts the same
+def test_joint_model_matches_separate_pipelines(trained_model, training_data):
+    df, texts = training_data
+    joint    = trained_model
+    features = joint["vectorizer"].transform(texts)
+
+    for head in ("category", "priority"):
+        separate = Pipeline([("tfidf", build_vectorizer()), ("clf", build_classifier())])
+        separate.fit(texts, df[head])
+        assert np.allclose(joint[head].predict_proba(features), separate.predict_proba(texts))
+        assert list(joint[head].classes_) == list(separate.classes_)
+
+
+# The original train.py saved two pipelines; they load as one joint model
+# and can be published as a version
+def test_original_pipeline_pair_loads_and_imports(trained_model, training_data, tmp_path, monkeypatch):
+    df, texts = training_data
+    pipelines = {}
+    for head, name in zip(("category", "priority"), registry.LEGACY_PIPELINES):
+        pipelines[head] = Pipeline([("tfidf", build_vectorizer()), ("clf", build_classifier())]).fit(texts, df[head])
+        with open(tmp_path / name, "wb") as f:
+            pickle.dump(pipelines[head], f)
+
+    monkeypatch.setattr(registry, "MODELS_DIR", str(tmp_path))
+    version, model = registry.load_current()
+    assert version == registry.UNVERSIONED and model["kind"] == "batch"
+    features = model["vectorizer"].transform(texts)
+    for head in ("category", "priority"):
+        assert (model[head].predict(features) == pipelines[head].predict(texts)).all()
+
+    imported = registry.publish(model, note="import")
+    assert registry.load_current()[0] == imported
+
+
+def test_pipeline_pair_with_different_vocabularies_is_refused(training_data, tmp_path, monkeypatch):
+    df, texts = training_data
+    for rows, name in ((slice(None), "category_model.pkl"), (slice(0, 40), "priority_model.pkl")):
+        pipeline = Pipeline([("tfidf", build_vectorizer()), ("clf", build_classifier())])
+        head = name.split("_")[0]
+        pipeline.fit(texts[rows], df[head][rows])
+        with open(tmp_path / name, "wb") as f:
+            pickle.dump(pipeline, f)
+
+    monkeypatch.setattr(registry, "MODELS_DIR", str(tmp_path))
+    with pytest.raises(ValueError, match="Retrain"):
+        registry.load_version(registry.UNVERSIONED)
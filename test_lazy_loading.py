@@ -0,0 +1,25 @@
+import os
+import sys
+import subprocess
+
+# Runs in a fresh interpreter, since this test process has long since loaded everything
+CHECK = """
+import os, sys
+sys.path[:0] = ["api", "src", "database"]
+import app, predict, preprocessor, sentiment
+
+assert predict._active is None
+assert preprocessor._stop_words is None and preprocessor._lemmatizer is None
+assert sentiment._analyzer is None
+assert not os.path.exists(os.environ["COMPLAINTS_DB"])
+
+predict.classify("I was charged twice this month.")
+assert predict._active is not None
+assert preprocessor._stop_words is not None and sentiment._analyzer is not None
+"""
+
+
+def test_import_loads_nothing_until_first_prediction(tmp_path):
+    env = dict(os.environ, COMPLAINTS_DB=str(tmp_path / "lazy.db"))
+    result = subprocess.run([sys.executable, "-c", CHECK], env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,29 @@
+import sys
+sys.path.insert(0, 'src')
+import metrics
+
+
+def test_histogram_buckets_are_cumulative():
+    latency = metrics.Histogram("test_latency_seconds", "Test latency", ["stage"], buckets=(0.1, 1.0))
+    child = latency.labels("clean")
+    for value in (0.05, 0.1, 0.5, 3.0):
+        child.observe(value)
+
+    lines = latency.render()
+    assert 'test_latency_seconds_bucket{stage="clean",le="0.1"} 2' in lines
+    assert 'test_latency_seconds_bucket{stage="clean",le="1"} 3' in lines
+    assert 'test_latency_seconds_bucket{stage="clean",le="+Inf"} 4' in lines
+    assert 'test_latency_seconds_count{stage="clean"} 4' in lines
+
+
+def test_counter_labels_and_escaping():
+    requests = metrics.Counter("test_requests_total", "Test requests", ["route"])
+    requests.labels('/a"b').inc()
+    requests.labels('/a"b').inc(1_000_000)
+    assert 'test_requests_total{route="/a\\"b"} 1000001' in requests.render()
+
+
+if __name__ == "__main__":
+    test_histogram_buckets_are_cumulative()
+    test_counter_labels_and_escaping()
+    print("Metrics checks passed.")
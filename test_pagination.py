@@ -0,0 +1,41 @@
+import pytest
+
+
+@pytest.fixture
+def db(temp_db):
+    temp_db.save_complaints([
+        (f"complaint {i}", ["Billing", "Technical"][i % 2], ["High", "Low", "Medium"][i % 3], i % 4 == 0)
+        for i in range(25)
+    ])
+    return temp_db
+
+
+def ids(rows):
+    return [row[0] for row in rows]
+
+
+def test_pages_walk_the_table_newest_first_without_gaps(db):
+    seen, before = [], None
+    while True:
+        page = db.get_recent_complaints(10, before_id=before)
+        if not page:
+            break
+        seen += ids(page)
+        before = page[-1][0]
+    assert seen == list(range(25, 0, -1))
+
+
+def test_after_id_returns_the_newer_page_still_newest_first(db):
+    older = db.get_recent_complaints(5, before_id=11)
+    assert ids(older) == [10, 9, 8, 7, 6]
+    assert ids(db.get_recent_complaints(5, after_id=older[0][0])) == [15, 14, 13, 12, 11]
+
+
+def test_filters_apply_to_every_page(db):
+    first = db.get_recent_complaints(3, category="Billing", rule_override=True)
+    rest  = db.get_recent_complaints(10, before_id=first[-1][0], category="Billing", rule_override=True)
+    with db.connection() as conn:
+        expected = ids(conn.execute(
+            "SELECT id FROM complaints WHERE category = 'Billing' AND rule_override = 1 ORDER BY id DESC").fetchall())
+    assert ids(first) + ids(rest) == expected
+    assert len(first) == 3
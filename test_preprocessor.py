@@ -0,0 +1,47 @@
+import sys
+sys.path.insert(0, 'src')
+import pandas as pd
+from preprocessor import clean_text, clean_many, clean_parallel, get_cache_stats, warm_up
+from parallel import map_chunks
+
+complaints = [
+    ("Visit https://help.example.com/page?id=3 or mail me at john.doe@mail.com", "visit mail"),
+    ("Charged $49.99 twice on 03/12!!", "charged num num twice num num"),
+    ("foo@http://x.com stays as foo", "foo stay foo"),
+    ("The routers were NOT working, cats", "router not working cat"),
+    ("", ""),
+]
+
+
+def test_clean_text():
+    for text, expected in complaints:
+        assert clean_text(text) == expected, (text, clean_text(text))
+
+
+def test_clean_many_matches_clean_text():
+    texts = [t for t, _ in complaints]
+    assert clean_many(texts) == [clean_text(t) for t in texts]
+
+
+# Chunks cleaned on a process pool come back complete and in input order
+def test_parallel_cleaning_matches_serial():
+    texts  = pd.read_csv("data/complaints_final.csv")["complaint_text"].astype(str).tolist()[:600]
+    serial = clean_many(texts)
+    assert map_chunks(clean_many, texts, workers=2, chunk_size=50, initializer=warm_up) == serial
+    assert clean_parallel(texts, workers=2) == serial
+
+
+def test_cache_stats():
+    clean_text("router router router")
+    stats = get_cache_stats()
+    assert stats["hits"] > 0
+    assert 0 < stats["hit_rate"] <= 1
+
+
+if __name__ == "__main__":
+    test_clean_text()
+    test_clean_many_matches_clean_text()
+    test_parallel_cleaning_matches_serial()
+    test_cache_stats()
+    print("Preprocessor checks passed.")
+    print(get_cache_stats())
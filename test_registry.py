@@ -0,0 +1,30 @@
+import sys
+sys.path.insert(0, 'src')
+
+import registry
+import predict
+
+text = "I was charged twice for the same subscription this month."
+
+
+def test_promote_swaps_served_version(trained_model, tmp_path, monkeypatch):
+    model = trained_model
+    monkeypatch.setattr(registry, "MODELS_DIR", str(tmp_path))
+    monkeypatch.setattr(predict, "_active", None)
+
+    v1 = registry.publish(model)
+    assert predict.classify(text).model_version == v1
+    assert predict.reload_model() is False
+
+    v2 = registry.publish(model, promote_now=False)
+    assert registry.current_version() == v1
+    registry.promote(v2)
+    assert predict.reload_model() is True
+    assert predict.classify(text).model_version == v2
+
+    # Rollback is just promoting the old version again
+    registry.promote(v1)
+    predict.reload_model()
+    assert predict.get_model_version() == v1
+    assert [m["version"] for m in registry.list_versions()] == [v1, v2]
+
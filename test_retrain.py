@@ -0,0 +1,26 @@
+import sys
+sys.path.insert(0, 'src')
+
+import registry
+import retrain
+
+
+def test_incremental_retrain_advances_the_watermark(temp_db, tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(registry, "MODELS_DIR", str(tmp_path / "models"))
+
+    retrain.full_retrain(workers=1, online=True, use_cache=False)
+    assert registry.load_current()[1]["feedback_watermark"] == 0
+
+    for i, (category, priority) in enumerate([("Billing", "High"), ("Technical", "Low"), ("Delivery", "Medium")]):
+        temp_db.save_feedback(i, f"complaint number {i} about my order", "Other", "Low", category, priority)
+
+    retrain.incremental_retrain()
+    version, model = registry.load_current()
+    assert model["kind"] == "online" and model["feedback_watermark"] == 3
+    assert len(registry.list_versions()) == 2
+
+    capsys.readouterr()
+    retrain.incremental_retrain()
+    assert "No new feedback since id 3" in capsys.readouterr().out
+    assert registry.current_version() == version
+    assert len(registry.list_versions()) == 2
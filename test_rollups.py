@@ -0,0 +1,39 @@
+import pytest
+
+
+def scan(conn, column, where=""):
+    return sorted(conn.execute(f"SELECT {column}, COUNT(*) FROM complaints {where} GROUP BY 1").fetchall())
+
+
+def assert_rollups_match_table(db):
+    with db.connection() as conn:
+        assert sorted(db.get_category_counts()) == scan(conn, "category")
+        assert sorted(db.get_priority_counts()) == scan(conn, "priority")
+        assert db.get_high_priority_trend() == scan(conn, "substr(classified_at, 1, 10)", "WHERE priority = 'High'")
+        assert db.count_complaints() == conn.execute("SELECT COUNT(*) FROM complaints").fetchone()[0]
+        assert db.count_complaints(category="Billing", rule_override=True) == conn.execute(
+            "SELECT COUNT(*) FROM complaints WHERE category = 'Billing' AND rule_override = 1").fetchone()[0]
+
+
+def test_rollups_follow_insert_update_and_delete(temp_db):
+    temp_db.insert_complaint_rows([
+        ("charged twice", "Billing", "High", True, "2024-01-01T09:15:00"),
+        ("refund late", "Billing", "Medium", False, "2024-01-01T09:45:00"),
+        ("router broken", "Technical", "High", False, "2024-01-02T13:00:00"),
+    ])
+    assert_rollups_match_table(temp_db)
+
+    with temp_db.connection() as conn:
+        conn.execute("UPDATE complaints SET category = 'Technical', priority = 'High' WHERE id = 2")
+        conn.execute("UPDATE complaints SET rule_override = 0, classified_at = '2024-01-03T08:00:00' WHERE id = 1")
+        conn.commit()
+    assert_rollups_match_table(temp_db)
+
+    with temp_db.connection() as conn:
+        conn.execute("DELETE FROM complaints WHERE id = 3")
+        conn.commit()
+    assert_rollups_match_table(temp_db)
+
+    # A full rebuild lands on the same numbers
+    temp_db.backfill_rollups()
+    assert_rollups_match_table(temp_db)
@@ -0,0 +1,55 @@
+import sys
+sys.path.insert(0, 'src')
+from rules import _required_literal, RuleEngine, HIGH_PRIORITY_PATTERNS, apply_priority_rules, apply_priority_rules_many
+
+complaints = [
+    ("Refund not received after 30 days.", "refund not received"),
+    ("My ACCOUNT was hacked, account blocked too.", r"account.{0,10}blocked"),
+    ("I work from home and it has been 3 days with no service.", r"\d+\s*days?.{0,10}(down|outage|no service|not working)"),
+    ("I didn't sign up for this plan.", r"didn.t sign up"),
+    ("Do you have any student discounts?", None),
+    ("Mön accöunt wäs hacked", None),
+]
+
+
+def test_first_rule_in_list_order_wins():
+    for text, expected in complaints:
+        priority, pattern = apply_priority_rules(text, "Low")
+        assert pattern == expected, (text, pattern)
+        assert priority == ("High" if expected else "Low")
+
+
+def test_batch_matches_single():
+    texts = [t for t, _ in complaints]
+    batch = apply_priority_rules_many(texts, ["Medium"] * len(texts))
+    assert batch == [apply_priority_rules(t, "Medium") for t in texts]
+
+
+def test_stats_count_hits():
+    engine = RuleEngine(HIGH_PRIORITY_PATTERNS)
+    engine.match_many(["charged twice", "charged twice again", "hello"])
+    stats = engine.stats()
+    assert stats["texts_evaluated"] == 3
+    assert stats["matched"] == 2
+    assert stats["rules"][2]["hits"] == 2
+
+
+# An unclosed or non-numeric "{" is a literal to re, not a quantifier — the
+# prefilter must treat it as one instead of scanning forever
+def test_literal_braces_in_patterns():
+    assert _required_literal("price {") == "price {"
+    assert _required_literal(r"fee \{ waived in full") == " waived in full"
+    assert _required_literal("a{x}yz") == "a{x"
+    assert _required_literal("refunds{2,3} now") == "refund"
+    engine = RuleEngine(["price {", r"fee \{waived\}"])
+    assert engine.match("The PRICE { was wrong") == 0
+    assert engine.match("fee {waived} but charged") == 1
+    assert engine.match("price was wrong") is None
+
+
+if __name__ == "__main__":
+    test_first_rule_in_list_order_wins()
+    test_batch_matches_single()
+    test_stats_count_hits()
+    test_literal_braces_in_patterns()
+    print("Rule engine checks passed.")
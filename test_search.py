@@ -0,0 +1,92 @@
+import sys
+import importlib.util
+sys.path.insert(0, 'api')
+
+import pytest
+
+import app as api
+
+_spec     = importlib.util.spec_from_file_location("dashboard_app", "dashboard/app.py")
+dashboard = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(dashboard)
+
+@pytest.fixture
+def db(temp_db):
+    # Rows written before the index exists are picked up when migrate() creates it
+    with temp_db.connection() as conn:
+        conn.execute("DROP TABLE complaints_fts")
+        for event in ("insert", "update", "delete"):
+            conn.execute(f"DROP TRIGGER trg_complaints_fts_{event}")
+        conn.commit()
+    temp_db.insert_complaint_rows([
+        ("I was charged twice for my bill", "Billing", "High", False, "2024-01-05T10:00:00"),
+        ("Refund for the double charge never arrived", "Billing", "Medium", False, "2024-02-01T10:00:00"),
+    ])
+    temp_db.migrate()
+    temp_db.insert_complaint_rows([
+        ("Internet down and I am being charged anyway <b>", "Technical", "High", True, "2024-03-01T10:00:00"),
+        ("Package lost in delivery", "Delivery", "Low", False, "2024-03-02T10:00:00"),
+    ])
+    return temp_db
+
+
+def test_search_ranks_filters_and_stays_in_sync(db):
+    total, results = db.search_complaints("charges")        # stemmed: charged / charge / charged
+    assert total == 3
+    assert all("[charge" in r["snippet"] for r in results)
+
+    total, results = db.search_complaints('"charged twice"')
+    assert total == 1 and results[0]["id"] == 1
+
+    assert db.search_complaints("charge", category="Billing", since="2024-01-10")[0] == 1
+    assert db.search_complaints("charge", until="2024-01-10")[0] == 1
+    assert db.search_complaints('((( OR "')[0] == 0      # never a syntax error
+
+    first  = db.search_complaints("charge", limit=2)[1]
+    second = db.search_complaints("charge", limit=2, offset=2)[1]
+    assert len(first) == 2 and len(second) == 1
+    assert not {r["id"] for r in first} & {r["id"] for r in second}
+
+    with db.connection() as conn:
+        conn.execute("UPDATE complaints SET complaint_text = 'Package stolen' WHERE id = 4")
+        conn.execute("DELETE FROM complaints WHERE id = 2")
+        conn.commit()
+    assert db.search_complaints("stolen")[0] == 1
+    assert db.search_complaints("lost")[0] == 0
+    assert db.search_complaints("refund")[0] == 0
+
+
+def test_search_api_and_page(db):
+    client = api.app.test_client()
+    body = client.get("/search?q=charged&limit=1").get_json()
+    assert body["total"] == 3 and len(body["results"]) == 1 and body["next_offset"] == 1
+    assert client.get("/search").status_code == 400
+    assert client.get("/search?q=x&limit=0").status_code == 400
+
+    page = dashboard.app.test_client().get("/search?q=internet").get_data(as_text=True)
+    assert "<mark>Internet</mark>" in page
+    assert "&lt;b&gt;" in page and "<b>" not in page
+
+
+def test_bad_dates_are_ignored_by_the_page_and_rejected_by_the_api(db):
+    page = dashboard.app.test_client().get("/search?q=refund&until=2024-99-99&since=yesterday")
+    assert page.status_code == 200
+    assert "1 matching complaint" in page.get_data(as_text=True)
+
+    client = api.app.test_client()
+    assert client.get("/search?q=refund&until=2024-99-99").status_code == 400
+    assert client.get("/search?q=refund&since=yesterday").status_code == 400
+    assert client.get("/search?q=charge&since=2024-02-01T00:00:00").get_json()["total"] == 2
+
+
+@pytest.mark.parametrize("params, total", [
+    ("q=package&since=20240302", 1),                        # compact date
+    ("q=charge&since=2024-03-01 11:00", 0),                 # space separator: 10:00 is before it
+    ("q=charge&since=2024-03-01T12:00:00%2B02:00", 1),      # 10:00 UTC
+    ("q=charge&until=2024-03-01", 3),                       # a date-only until covers that whole day
+    ("q=charge&until=2024-03-01T10:00:00", 2),              # a timestamp until is exclusive
+])
+def test_date_bounds_are_parsed_the_same_by_api_and_page(db, params, total):
+    assert api.app.test_client().get(f"/search?{params}").get_json()["total"] == total
+    page = dashboard.app.test_client().get(f"/search?{params}").get_data(as_text=True)
+    assert f"{total} matching complaint" in page
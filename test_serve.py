@@ -0,0 +1,112 @@
+import os
+import sys
+import json
+import time
+import socket
+import signal
+import sqlite3
+import tempfile
+import subprocess
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+SERVE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "api", "serve.py")
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(db_path, workers, max_requests=0):
+    port = _free_port()
+    env  = dict(os.environ, COMPLAINTS_DB=db_path, PREDICTION_CACHE_SIZE="0")
+    proc = subprocess.Popen(
+        [sys.executable, SERVE, "--bind", f"127.0.0.1:{port}", "--workers", str(workers),
+         "--max-requests", str(max_requests), "--max-requests-jitter", "0"],
+        env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+    )
+    line = proc.stdout.readline()       # printed once the workers are forked
+    assert "Serving on" in line, line
+    return proc, f"http://127.0.0.1:{port}"
+
+
+def stop_server(proc):
+    proc.send_signal(signal.SIGTERM)
+    assert proc.wait(timeout=60) == 0
+
+
+def post(url, text):
+    request = urllib.request.Request(url + "/classify-complaint", data=json.dumps({"text": text}).encode(),
+                                     headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=60) as response:
+        return response.status, response.headers["X-Worker-Pid"]
+
+
+def throughput(url, requests, concurrency):
+    texts = [f"I was charged twice on my bill, ticket {i}" for i in range(requests)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(lambda t: post(url, t), texts))
+    return requests / (time.perf_counter() - start)
+
+
+def test_workers_share_the_socket_recycle_and_flush_on_shutdown():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "serve.db")
+        proc, url = start_server(db_path, workers=2, max_requests=5)
+        try:
+            with ThreadPoolExecutor(4) as pool:
+                results = list(pool.map(lambda i: post(url, f"My internet is down again {i}"), range(30)))
+        finally:
+            stop_server(proc)
+
+        assert all(status == 200 for status, _ in results)
+        # 30 requests at 5 per worker: at least six distinct worker processes served them
+        assert len({pid for _, pid in results}) >= 6
+        with sqlite3.connect(db_path) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM complaints").fetchone()[0] == 30
+
+
+def test_parent_holds_no_database_connections():
+    if not os.path.isdir("/proc/self/fd"):
+        pytest.skip("needs /proc to list open files")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "serve.db")
+        proc, url = start_server(db_path, workers=1)
+        try:
+            fd_dir = f"/proc/{proc.pid}/fd"
+            open_files = {os.readlink(os.path.join(fd_dir, fd)) for fd in os.listdir(fd_dir)}
+            assert not any(path.startswith(db_path) for path in open_files), open_files
+        finally:
+            stop_server(proc)
+
+
+def test_throughput_scales_with_workers():
+    cores = os.cpu_count() or 1
+    if cores < 2:
+        pytest.skip("throughput scaling needs more than one core")
+
+    rates = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in (1, min(cores, 4)):
+            proc, url = start_server(os.path.join(tmp, f"scale{workers}.db"), workers=workers)
+            try:
+                throughput(url, 20, workers * 2)        # warm-up
+                rates[workers] = throughput(url, 200, workers * 2)
+            finally:
+                stop_server(proc)
+
+    one, many = rates[1], rates[max(rates)]
+    print(f"1 worker {one:.0f} req/s, {max(rates)} workers {many:.0f} req/s")
+    assert many > one * 1.3
+
+
+if __name__ == "__main__":
+    test_workers_share_the_socket_recycle_and_flush_on_shutdown()
+    if (os.cpu_count() or 1) > 1:
+        test_throughput_scales_with_workers()
+    print("Prefork server checks passed.")
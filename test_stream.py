@@ -0,0 +1,28 @@
+import sys
+import json
+sys.path.insert(0, 'api')
+
+import app as api
+
+
+def test_stream_returns_one_result_per_line_in_order(temp_db, monkeypatch):
+    monkeypatch.setattr(api, "STREAM_BATCH", 2)
+    body = "\n".join([
+        json.dumps("Refund not received after 30 days."),
+        json.dumps({"text": "My internet is down", "id": "t-9"}),
+        "not json",
+        json.dumps({"text": ""}),
+        json.dumps("I was charged twice this month."),
+    ])
+    response = api.app.test_client().post("/classify-complaint/stream", data=body,
+                                           content_type="application/x-ndjson")
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+
+    results = [json.loads(line) for line in response.data.decode().splitlines()]
+    assert [r["line"] for r in results] == [0, 1, 2, 3, 4]
+    assert results[1]["id"] == "t-9" and "category" in results[1]
+    assert "error" in results[2] and "error" in results[3]
+    assert results[4]["priority"] == "High"
+    assert temp_db.count_complaints() == 3
+
@@ -0,0 +1,106 @@
+import os
+import time
+import threading
+
+import pytest
+
+import write_behind
+from write_behind import WriteBehindWriter
+
+ROW = ("My internet is down", "Technical", "High", False)
+
+
+def submit(writer, n):
+    return [writer.submit(*ROW) for _ in range(n)]
+
+
+def on_writer_thread():
+    return threading.current_thread().name == "write-behind"
+
+
+def test_stop_flushes_queued_rows(temp_db):
+    writer = WriteBehindWriter(flush_rows=1000, flush_interval_ms=10_000).start()
+    submit(writer, 5)
+    writer.stop()
+    assert temp_db.count_complaints() == 5
+    assert writer.stats()["written"] == 5
+
+
+@pytest.mark.parametrize("policy, accepted, total, dropped, sync_writes", [
+    ("drop",  False, 2, 1, 0),
+    ("sync",  True,  3, 0, 1),
+    ("block", True,  3, 0, 1),      # waits BLOCK_TIMEOUT, then writes synchronously
+])
+def test_backpressure_policies(temp_db, monkeypatch, policy, accepted, total, dropped, sync_writes):
+    gate, insert = threading.Event(), write_behind.insert_complaint_rows
+    def held(rows):
+        if on_writer_thread():
+            gate.wait()
+        insert(rows)
+    monkeypatch.setattr(write_behind, "insert_complaint_rows", held)
+    monkeypatch.setattr(write_behind, "BLOCK_TIMEOUT", 0.05)
+
+    writer = WriteBehindWriter(flush_rows=1, max_queue=1, policy=policy).start()
+    writer.submit(*ROW)                 # taken by the writer thread, which blocks on the gate
+    while writer.stats()["queue_depth"]:
+        time.sleep(0.01)
+    writer.submit(*ROW)                 # fills the queue
+    assert writer.submit(*ROW) is accepted
+
+    gate.set()
+    writer.stop()
+    stats = writer.stats()
+    assert (stats["dropped"], stats["sync_writes"]) == (dropped, sync_writes)
+    assert temp_db.count_complaints() == total
+
+
+def test_failed_flush_is_retried_not_lost(temp_db, monkeypatch):
+    failures, insert = [2], write_behind.insert_complaint_rows
+    def flaky(rows):
+        if on_writer_thread() and failures[0]:
+            failures[0] -= 1
+            raise RuntimeError("database is locked")
+        insert(rows)
+    monkeypatch.setattr(write_behind, "insert_complaint_rows", flaky)
+    monkeypatch.setattr(write_behind, "RETRY_BACKOFF", 0.01)
+
+    writer = WriteBehindWriter(flush_interval_ms=5).start()
+    submit(writer, 3)
+    writer.flush()
+    assert temp_db.count_complaints() == 3
+    assert writer.stats()["failed_flushes"] == 2
+    writer.stop()
+
+
+def test_stop_raises_when_rows_cannot_be_written(temp_db, monkeypatch):
+    def broken(rows):
+        raise RuntimeError("disk full")
+    monkeypatch.setattr(write_behind, "insert_complaint_rows", broken)
+
+    writer = WriteBehindWriter(flush_interval_ms=5).start()
+    submit(writer, 2)
+    with pytest.raises(RuntimeError, match="disk full"):
+        writer.stop()
+
+
+def test_submit_after_stop_writes_synchronously(temp_db):
+    writer = WriteBehindWriter().start()
+    writer.stop()
+    assert submit(writer, 2) == [True, True]
+    assert temp_db.count_complaints() == 2
+    assert writer.stats()["sync_writes"] == 2
+
+
+def test_forked_child_gets_its_own_writer_thread(temp_db):
+    writer = WriteBehindWriter(flush_interval_ms=5).start()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            submit(writer, 2)
+            writer.flush()
+            os._exit(0 if writer.stats()["written"] == 2 else 1)
+        except BaseException:
+            os._exit(2)
+    assert os.waitpid(pid, 0)[1] == 0
+    writer.stop()
+    assert temp_db.count_complaints() == 2